@@ -1,8 +1,11 @@
+import asyncio
 import json
 import logging
 import os
 import pytz
+import re
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
 from jsonschema import validate, ValidationError
@@ -12,58 +15,89 @@ from qrcode import QRCode, constants
 from vcclib import database
 from vcclib.common import is_debug
 from vcclib.common import is_set
+from vcclib.model import ImportGeneration
 from vcclib.model import Stop
 from vcclib.model import Trip
 from vcclib.model import MasterDataVehicle
 from vcclib.model import MasterDataObjectClass
 
 from vcclib.model import sqlobject2dict
+from vccapi.snapshot import SnapshotCache
 
 # set logging default configuration
 logging.basicConfig(format="[%(levelname)s] %(asctime)s %(message)s", level=logging.INFO)
 
-# init database connection
-database.init()
+# init database connection, the schema is migrated by the importers
+database.init(migrate=False)
+
+# database queries are blocking, so they're running in a bounded thread pool instead of the event loop,
+# each thread uses a connection of its own, so the pool size limits the number of concurrent queries
+database_executor = ThreadPoolExecutor(max_workers=int(os.getenv('VCC_API_DATABASE_THREADS', '8')), thread_name_prefix='vccapi-database')
+
+async def run_in_database_executor(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(database_executor, func, *args)
+
+# stops, departures and trips are served from an in-memory snapshot of the timetable if enabled,
+# each worker process builds its own snapshot and rebuilds it after a new import generation
+if is_set('VCC_API_SNAPSHOT_CACHE'):
+    snapshot_cache = SnapshotCache(int(os.getenv('VCC_API_SNAPSHOT_CHECK_INTERVAL', '60')))
+else:
+    snapshot_cache = None
+
+def timetable():
+    # the snapshot provides the same lookup and departures methods as Stop
+    return snapshot_cache.get() if snapshot_cache is not None else Stop
 
 # create fastapi instance
 app = FastAPI()
 
+@app.on_event('shutdown')
+def shutdown():
+    database_executor.shutdown(wait=True)
+
 # define ressouces and routes
 @app.get('/stops/byLookupName/{lookup_name}')
 async def stops_by_name(lookup_name):
-    return Stop.lookup(lookup_name, is_set('VCC_API_ONLY_STARTING_TRIPS'))
+    return await run_in_database_executor(lambda: timetable().lookup(lookup_name, is_set('VCC_API_ONLY_STARTING_TRIPS')))
 
 @app.get('/departures/byParentStopId/{parent_stop_id}')
-async def departures_by_parent_stop_id(parent_stop_id):
+async def departures_by_parent_stop_id(parent_stop_id, limit: int|None = None, cursor: str|None = None):
     parent_stop_id = int(parent_stop_id)
 
+    # departures are paged using the cursor of the last departure of the previous page
+    if cursor is not None and re.fullmatch(r"\d+-\d+-\d+", cursor) is None:
+        return Response(status_code=400)
+
+    if limit is not None and limit < 1:
+        return Response(status_code=400)
+
     reference_timestamp = datetime.now().timestamp() - 3600
-    
-    result = list()
-    for d in Stop.departures(parent_stop_id, is_set('VCC_API_ONLY_STARTING_TRIPS')):
-        if d.departure_timestamp >= reference_timestamp:
-            obj = {
-                'stop_id': d.stop.stop_id,
-                'line': sqlobject2dict(d.trip.line),
-                'trip_id': d.trip.trip_id,
-                'direction': d.trip.direction,
-                'headsign': d.trip.headsign,
-                'international_id': d.trip.international_id,
-                'operation_day': d.trip.operation_day,
-                'arrival_timestamp': d.arrival_timestamp,
-                'departure_timestamp': d.departure_timestamp,
-                'sequence': d.sequence
-            }
-
-            result.append(obj)
-
-    return result
+
+    return await run_in_database_executor(lambda: timetable().departures(parent_stop_id, is_set('VCC_API_ONLY_STARTING_TRIPS'), reference_timestamp, limit, cursor))
 
 @app.get('/trips/byTripId/{trip_id}')
-async def trips_by_id(trip_id):
+async def trips_by_id(trip_id, operation_day: int|None = None):
     trip_id = int(trip_id)
 
-    trip = Trip.select(Trip.q.trip_id == trip_id).getOne()
+    # trips are imported for multiple operation days, use the trip of the current 
+    # operation day if there's no operation day requested explicitly
+    explicit_operation_day = operation_day is not None
+    if operation_day is None:
+        operation_day = int(datetime.now().strftime('%Y%m%d'))
+
+    return await run_in_database_executor(_load_trip, trip_id, operation_day, explicit_operation_day)
+
+def _load_trip(trip_id, operation_day, explicit_operation_day):
+    if snapshot_cache is not None:
+        trip_result = snapshot_cache.get().trip(trip_id, operation_day, explicit_operation_day)
+        if trip_result is None:
+            return Response(status_code=404)
+
+        return trip_result
+
+    trip = Trip.find(trip_id, operation_day, explicit_operation_day)
+    if trip is None:
+        return Response(status_code=404)
 
     stop_times_result = list()
     for st in trip.stop_times():
@@ -89,11 +123,11 @@ async def trips_by_id(trip_id):
 
 @app.get('/masterdata/vehicles')
 async def masterdata_vehicles():
-    return [sqlobject2dict(o) for o in MasterDataVehicle.select().orderBy(MasterDataVehicle.q.name)]
+    return await run_in_database_executor(lambda: [sqlobject2dict(o) for o in MasterDataVehicle.select().orderBy(MasterDataVehicle.q.name)])
 
 @app.get('/masterdata/objectclasses')
 async def masterdata_objectclasses():
-    return [sqlobject2dict(o) for o in MasterDataObjectClass.select().orderBy(MasterDataObjectClass.q.name)]
+    return await run_in_database_executor(lambda: [sqlobject2dict(o) for o in MasterDataObjectClass.select().orderBy(MasterDataObjectClass.q.name)])
 
 @app.post('/results/post/{guid}')
 async def results_post(guid, request: Request):
@@ -188,5 +222,7 @@ async def system_health():
     vcc_timezone = os.getenv('VCC_TIMEZONE', 'Europe/Berlin')
 
     return {
-        'timestamp': int(datetime.now().astimezone((pytz.timezone(vcc_timezone))).timestamp())
+        'timestamp': int(datetime.now().astimezone((pytz.timezone(vcc_timezone))).timestamp()),
+        'import_generation': await run_in_database_executor(ImportGeneration.current),
+        'snapshot': snapshot_cache.stats() if snapshot_cache is not None else None
     }
\ No newline at end of file
@@ -0,0 +1,388 @@
+import logging
+import numpy
+import sys
+import threading
+import time
+
+from sqlobject.col import SOBoolCol
+from sqlobject.sqlbuilder import Select
+
+from vcclib import database
+from vcclib.model import ImportGeneration
+from vcclib.model import Line
+from vcclib.model import PatternStop
+from vcclib.model import Stop
+from vcclib.model import StopTime
+from vcclib.model import Trip
+from vcclib.search import StationIndex
+
+
+class TimetableSnapshot:
+
+    def __init__(self, generation: int|None) -> None:
+        self.generation = generation
+
+        start_time = time.perf_counter()
+
+        # stops, lines and trips are kept as the dicts returned by the API, they're referenced
+        # by their index, all stop times are stored in flat arrays ordered by trip and sequence
+        self._load_stops()
+        self._load_lines()
+        self._load_trips()
+        self._load_stop_times()
+
+        self._departures = self._create_departures(False)
+        self._starting_departures = self._create_departures(True)
+
+        self._station_indexes: dict = {
+            False: StationIndex(Stop.stations(False)),
+            True: StationIndex(Stop.stations(True))
+        }
+
+        self.build_seconds = time.perf_counter() - start_time
+        self.memory_bytes = self._estimate_memory()
+
+    def lookup(self, lookup_name: str, only_starting_stations: bool = False) -> list:
+        return self._station_indexes[only_starting_stations].lookup(lookup_name)
+
+    def departures(self, parent_stop_id: int, only_starting_trips: bool = False, from_timestamp: int|None = None, limit: int|None = None, cursor: str|None = None) -> list:
+        order, departure_timestamps, ranges = self._starting_departures if only_starting_trips else self._departures
+        if parent_stop_id not in ranges:
+            return list()
+
+        start, end = ranges[parent_stop_id]
+
+        # departures of a parent stop are ordered by their departure timestamp, the trip and the sequence,
+        # the same as Stop.departures, so the first departure of a page is found by a binary search
+        if from_timestamp is not None:
+            start = start + int(numpy.searchsorted(departure_timestamps[start:end], from_timestamp, side='left'))
+
+        if cursor is not None:
+            cursor_departure_timestamp, cursor_trip, cursor_sequence = [int(c) for c in cursor.split('-')]
+
+            position = start + int(numpy.searchsorted(departure_timestamps[start:end], cursor_departure_timestamp, side='left'))
+            while position < end and departure_timestamps[position] == cursor_departure_timestamp:
+                i = order[position]
+                if (int(self._trip_db_ids[self._stop_time_trips[i]]), int(self._stop_time_sequences[i])) > (cursor_trip, cursor_sequence):
+                    break
+
+                position = position + 1
+
+            start = max(start, position)
+
+        if limit is not None:
+            end = min(end, start + limit)
+
+        result = list()
+        for i in order[start:end].tolist():
+            trip: dict = self._trips[self._stop_time_trips[i]]
+            stop: dict = self._stops[self._stop_time_stops[i]]
+
+            departure_timestamp = int(self._stop_time_departures[i])
+            sequence = int(self._stop_time_sequences[i])
+
+            result.append({
+                'stop_id': stop['stop_id'],
+                'line': trip['line'],
+                'trip_id': trip['trip_id'],
+                'direction': trip['direction'],
+                'headsign': trip['headsign'],
+                'international_id': trip['international_id'],
+                'operation_day': trip['operation_day'],
+                'arrival_timestamp': int(self._stop_time_arrivals[i]),
+                'departure_timestamp': departure_timestamp,
+                'sequence': sequence,
+                'cursor': f"{departure_timestamp}-{int(self._trip_db_ids[self._stop_time_trips[i]])}-{sequence}"
+            })
+
+        return result
+
+    def trip(self, trip_id: int, operation_day: int, explicit_operation_day: bool = False) -> dict|None:
+        if trip_id not in self._trip_index:
+            return None
+
+        # use the trip of the requested operation day or the next one, the last trip available
+        # is used only if the operation day wasn't requested explicitly, the same as Trip.find
+        trips: list = self._trip_index[trip_id]
+        t = next((t for t in trips if self._trips[t]['operation_day'] >= operation_day), trips[-1] if not explicit_operation_day else None)
+        if t is None:
+            return None
+
+        start, end = int(self._trip_offsets[t]), int(self._trip_offsets[t + 1])
+
+        stop_times_result = list()
+        for stop, arrival_timestamp, departure_timestamp, sequence in zip(
+            self._stop_time_stops[start:end].tolist(),
+            self._stop_time_arrivals[start:end].tolist(),
+            self._stop_time_departures[start:end].tolist(),
+            self._stop_time_sequences[start:end].tolist()
+        ):
+            stop_times_result.append({
+                'stop': self._stops[stop],
+                'arrival_timestamp': arrival_timestamp,
+                'departure_timestamp': departure_timestamp if departure_timestamp >= 0 else None,
+                'sequence': sequence
+            })
+
+        return {**self._trips[t], 'stop_times': stop_times_result}
+
+    def _load_stops(self) -> None:
+        columns: list = Stop.sqlmeta.columnList
+        rows: list = database.connection().queryAll(f"SELECT {Stop.sqlmeta.idName}, {', '.join([c.dbName for c in columns])} FROM {Stop.sqlmeta.table} ORDER BY {Stop.sqlmeta.idName}")
+
+        self._stop_db_ids = numpy.array([r[0] for r in rows], dtype=numpy.int64)
+        self._stops: list = [self._to_record(columns, r[1:]) for r in rows]
+        self._stop_parents = numpy.array([s['parent_id'] for s in self._stops], dtype=numpy.int64)
+
+    def _load_lines(self) -> None:
+        columns: list = Line.sqlmeta.columnList
+        rows: list = database.connection().queryAll(f"SELECT {Line.sqlmeta.idName}, {', '.join([c.dbName for c in columns])} FROM {Line.sqlmeta.table}")
+
+        self._lines: dict = {r[0]: self._to_record(columns, r[1:]) for r in rows}
+
+    def _load_trips(self) -> None:
+        rows: list = database.connection().queryAll(database.connection().sqlrepr(Select((
+            Trip.q.id,
+            Trip.q.trip_id,
+            Trip.q.line,
+            Trip.q.direction,
+            Trip.q.headsign,
+            Trip.q.international_id,
+            Trip.q.operation_day,
+            Trip.q.next_trip_id,
+            Trip.q.pattern,
+            Trip.q.start_timestamp
+        ), orderBy=Trip.q.id)))
+
+        self._trip_db_ids = numpy.array([r[0] for r in rows], dtype=numpy.int64)
+        self._trip_patterns = numpy.array([r[8] if r[8] is not None else -1 for r in rows], dtype=numpy.int64)
+        self._trip_start_timestamps = numpy.array([r[9] if r[9] is not None else 0 for r in rows], dtype=numpy.int64)
+
+        self._trips: list = list()
+        self._trip_index: dict = dict()
+
+        for t, r in enumerate(rows):
+            if r[2] not in self._lines:
+                raise ValueError(f"Line {r[2]} of trip {r[0]} not found")
+
+            self._trips.append({
+                'trip_id': r[1],
+                'line': self._lines[r[2]],
+                'direction': r[3],
+                'headsign': r[4],
+                'international_id': r[5],
+                'operation_day': r[6],
+                'next_trip_id': r[7]
+            })
+
+            self._trip_index.setdefault(r[1], list()).append(t)
+
+        for trips in self._trip_index.values():
+            trips.sort(key=lambda t: self._trips[t]['operation_day'])
+
+    def _load_stop_times(self) -> None:
+        stop_time_rows: list = database.connection().queryAll(database.connection().sqlrepr(Select((
+            StopTime.q.trip,
+            StopTime.q.stop,
+            StopTime.q.arrival_timestamp,
+            StopTime.q.departure_timestamp,
+            StopTime.q.sequence
+        ))))
+
+        trips, stops, arrivals, departures, sequences = self._to_arrays(stop_time_rows)
+        trips = self._resolve(self._trip_db_ids, trips, 'trip')
+
+        # trips imported in pattern mode don't have any stop times, their stop times are expanded from the patterns
+        pattern_stop_rows: list = database.connection().queryAll(database.connection().sqlrepr(Select((
+            PatternStop.q.pattern,
+            PatternStop.q.stop,
+            PatternStop.q.arrival_offset,
+            PatternStop.q.departure_offset,
+            PatternStop.q.sequence
+        ), orderBy=(PatternStop.q.pattern, PatternStop.q.sequence))))
+
+        patterns, pattern_stops, arrival_offsets, departure_offsets, pattern_sequences = self._to_arrays(pattern_stop_rows)
+
+        pattern_trips = numpy.nonzero(self._trip_patterns >= 0)[0]
+        pattern_starts = numpy.searchsorted(patterns, self._trip_patterns[pattern_trips], side='left')
+        pattern_ends = numpy.searchsorted(patterns, self._trip_patterns[pattern_trips], side='right')
+
+        counts = pattern_ends - pattern_starts
+        if numpy.any(counts == 0):
+            raise ValueError(f"Stop pattern of {numpy.count_nonzero(counts == 0)} trip(s) not found")
+
+        expanded_trips = numpy.repeat(pattern_trips, counts)
+        expanded_rows = numpy.repeat(pattern_starts - numpy.cumsum(counts) + counts, counts) + numpy.arange(counts.sum())
+
+        start_timestamps = self._trip_start_timestamps[expanded_trips]
+
+        trips = numpy.concatenate([trips, expanded_trips])
+        stops = numpy.concatenate([stops, pattern_stops[expanded_rows]])
+        arrivals = numpy.concatenate([arrivals, start_timestamps + arrival_offsets[expanded_rows]])
+        departures = numpy.concatenate([departures, numpy.where(departure_offsets[expanded_rows] >= 0, start_timestamps + departure_offsets[expanded_rows], -1)])
+        sequences = numpy.concatenate([sequences, pattern_sequences[expanded_rows]])
+
+        # departures which don't exist are stored as -1
+        order = numpy.lexsort((sequences, trips))
+
+        self._stop_time_trips = trips[order]
+        self._stop_time_stops = self._resolve(self._stop_db_ids, stops[order], 'stop')
+        self._stop_time_arrivals = arrivals[order]
+        self._stop_time_departures = departures[order]
+        self._stop_time_sequences = sequences[order]
+
+        self._trip_offsets = numpy.searchsorted(self._stop_time_trips, numpy.arange(len(self._trips) + 1), side='left')
+
+    def _resolve(self, db_ids: numpy.ndarray, references: numpy.ndarray, name: str) -> numpy.ndarray:
+        indexes = numpy.searchsorted(db_ids, references)
+
+        # tables are loaded one after another and may be swapped by an import in the meantime, IDs are never
+        # reused across imports, so references between tables of different imports are never found
+        found = indexes < len(db_ids)
+        found[found] = db_ids[indexes[found]] == references[found]
+
+        if not numpy.all(found):
+            raise ValueError(f"{numpy.count_nonzero(~found)} {name} reference(s) not found")
+
+        return indexes
+
+    def _to_record(self, columns: list, values: tuple) -> dict:
+        # booleans are returned as integers by the database driver, they're converted the same
+        # as by SQLObject, so that records are the same as created by sqlobject2dict
+        return {c.name: bool(v) if isinstance(c, SOBoolCol) and v is not None else v for c, v in zip(columns, values)}
+
+    def _to_arrays(self, rows: list) -> list:
+        columns = list()
+        for c in range(5):
+            columns.append(numpy.array([r[c] if r[c] is not None else -1 for r in rows], dtype=numpy.int64))
+
+        return columns
+
+    def _create_departures(self, only_starting_trips: bool) -> tuple:
+        mask = self._stop_time_departures >= 0
+        if only_starting_trips:
+            mask = mask & (self._stop_time_sequences == 1)
+
+        indexes = numpy.nonzero(mask)[0]
+        parents = self._stop_parents[self._stop_time_stops[indexes]]
+
+        order = indexes[numpy.lexsort((
+            self._stop_time_sequences[indexes],
+            self._trip_db_ids[self._stop_time_trips[indexes]],
+            self._stop_time_departures[indexes],
+            parents
+        ))]
+
+        sorted_parents = self._stop_parents[self._stop_time_stops[order]]
+        parent_ids, starts = numpy.unique(sorted_parents, return_index=True)
+        ends = numpy.append(starts[1:], len(order))
+
+        ranges: dict = {p: (s, e) for p, s, e in zip(parent_ids.tolist(), starts.tolist(), ends.tolist())}
+
+        return order, self._stop_time_departures[order], ranges
+
+    def _estimate_memory(self) -> int:
+        memory_bytes = 0
+
+        for value in vars(self).values():
+            if isinstance(value, numpy.ndarray):
+                memory_bytes = memory_bytes + value.nbytes
+
+        for order, departure_timestamps, ranges in [self._departures, self._starting_departures]:
+            memory_bytes = memory_bytes + order.nbytes + departure_timestamps.nbytes + sys.getsizeof(ranges)
+
+        # records are estimated by their dicts and values, lines are shared by all of their trips
+        for records in [self._stops, self._trips, list(self._lines.values())]:
+            memory_bytes = memory_bytes + sys.getsizeof(records)
+            for record in records:
+                memory_bytes = memory_bytes + sys.getsizeof(record) + sum([sys.getsizeof(v) for v in record.values() if not isinstance(v, dict)])
+
+        memory_bytes = memory_bytes + sys.getsizeof(self._trip_index) + sum([sys.getsizeof(trips) for trips in self._trip_index.values()])
+        memory_bytes = memory_bytes + sum([index.memory_bytes() for index in self._station_indexes.values()])
+
+        return memory_bytes
+
+
+class SnapshotCache:
+
+    def __init__(self, check_interval: int, max_attempts: int = 3) -> None:
+        self._check_interval = check_interval
+        self._max_attempts = max_attempts
+
+        self._snapshot: TimetableSnapshot|None = None
+        self._checked: float = 0.0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.builds = 0
+
+    def get(self) -> TimetableSnapshot:
+        # the import generation is checked at most once per interval, all requests in between
+        # are served by the current snapshot without touching the database
+        if self._snapshot is not None and time.monotonic() - self._checked < self._check_interval:
+            self.hits = self.hits + 1
+            return self._snapshot
+
+        # only one thread checks and builds a new snapshot, other threads are served by the
+        # previous snapshot in the meantime, unless there's no snapshot yet
+        if not self._lock.acquire(blocking=self._snapshot is None):
+            self.hits = self.hits + 1
+            return self._snapshot
+
+        try:
+            if self._snapshot is None or time.monotonic() - self._checked >= self._check_interval:
+                generation = ImportGeneration.current()
+
+                if self._snapshot is None or self._snapshot.generation != generation:
+                    snapshot = self._build()
+                    if snapshot is None and self._snapshot is None:
+                        raise RuntimeError(f"No consistent timetable snapshot built after {self._max_attempts} attempt(s)")
+
+                    # the snapshot is switched by replacing the reference, requests which are still
+                    # using the previous snapshot are finished with the previous snapshot
+                    if snapshot is not None:
+                        self._snapshot = snapshot
+                        self.builds = self.builds + 1
+
+                        logging.info(f"Built timetable snapshot of generation {snapshot.generation} in {snapshot.build_seconds:.3f}s, using {snapshot.memory_bytes / 1024 / 1024:.1f} MB")
+
+                # a new import may have finished in the meantime or the snapshot couldn't be built, 
+                # then it's checked again with the next request
+                if ImportGeneration.current() == self._snapshot.generation:
+                    self._checked = time.monotonic()
+                else:
+                    self._checked = 0.0
+
+            return self._snapshot
+        finally:
+            self._lock.release()
+
+    def _build(self) -> TimetableSnapshot|None:
+        # an import may swap the tables while the snapshot is loaded, so the snapshot is discarded if the import 
+        # generation has changed or any reference wasn't found, and built again
+        for attempt in range(self._max_attempts):
+            generation = ImportGeneration.current()
+
+            try:
+                snapshot = TimetableSnapshot(generation)
+            except ValueError as ex:
+                logging.warning(f"Discarded timetable snapshot of generation {generation} in attempt {attempt + 1}: {ex}")
+                continue
+
+            if ImportGeneration.current() == generation:
+                return snapshot
+
+            logging.warning(f"Discarded timetable snapshot of generation {generation} in attempt {attempt + 1}: import generation has changed")
+
+        return None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+
+        return {
+            'generation': snapshot.generation if snapshot is not None else None,
+            'memory_mb': round(snapshot.memory_bytes / 1024 / 1024, 1) if snapshot is not None else 0.0,
+            'build_seconds': round(snapshot.build_seconds, 3) if snapshot is not None else None,
+            'hits': self.hits,
+            'builds': self.builds
+        }
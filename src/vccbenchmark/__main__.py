@@ -0,0 +1,87 @@
+import click
+import json
+import logging
+import os
+
+from vccbenchmark.generator import Vdv452Generator
+from vccbenchmark.benchmark import Vdv452Benchmark
+from vccvdv452import.adapter.default import DefaultAdapter
+from vccvdv452import.adapter.vvs import VvsAdapter
+
+@click.group()
+def cli():
+    pass
+
+@cli.command()
+@click.argument('output_directory')
+@click.option('--stops', default=1000, help='Number of stops in the network')
+@click.option('--lines', default=50, help='Number of lines, each line has two variants')
+@click.option('--trips', default=5000, help='Number of trips per day')
+@click.option('--days', default=14, help='Number of operation days in the calendar')
+@click.option('--route-length', default=20, help='Number of stops per line variant')
+@click.option('--trip-links', is_flag=True, default=False, help='Generate rec_frt_durchbindung.x10 for the VVS adapter')
+@click.option('--seed', default=None, type=int, help='Seed for reproducible datasets')
+def generate(output_directory, stops, lines, trips, days, route_length, trip_links, seed):
+
+    # set logging default configuration
+    logging.basicConfig(format="[%(levelname)s] %(asctime)s %(message)s", level=logging.INFO)
+
+    generator = Vdv452Generator(stops, lines, trips, days, route_length, seed)
+    num_records = generator.generate(output_directory, trip_links)
+
+    for x10filename, count in num_records.items():
+        logging.info(f"Generated {count} records in {x10filename}")
+
+@cli.command()
+@click.argument('input_directory')
+@click.option('--adapter', 'adapter_type', default='default', type=click.Choice(['default', 'vvs']), help='Adapter used for the import')
+@click.option('--database', 'database_uri', default=None, help='SQLObject connection URI, a temporary SQLite database is used by default')
+@click.option('--workers', default=1, help='Number of worker processes used for loading the files and generating stop times')
+@click.option('--storage', default='stoptimes', type=click.Choice(['stoptimes', 'patterns']), help='Store stop times for every trip or as shared stop patterns')
+@click.option('--skip-import', is_flag=True, default=False, help='Measure reading X10 files only')
+@click.option('--output', default=None, help='Write the results as JSON to this file')
+def run(input_directory, adapter_type, database_uri, workers, storage, skip_import, output):
+
+    # set logging default configuration
+    logging.basicConfig(format="[%(levelname)s] %(asctime)s %(message)s", level=logging.INFO)
+
+    os.environ['VCC_VDV452_IMPORT_WORKERS'] = str(workers)
+    os.environ['VCC_VDV452_IMPORT_STORAGE'] = storage
+
+    benchmark = Vdv452Benchmark(input_directory, database_uri)
+    results: dict = dict()
+
+    # import runs first, so that the peak RSS of its workers isn't mixed up with the read processes
+    if not skip_import:
+        adapter = VvsAdapter() if adapter_type == 'vvs' else DefaultAdapter()
+        results['import'] = benchmark.run_import(adapter)
+
+    results['read_x10_file'] = benchmark.run_read_x10_files()
+
+    if output is not None:
+        with open(output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+
+@cli.command()
+@click.argument('input_directory')
+@click.option('--adapter', 'adapter_type', default='default', type=click.Choice(['default', 'vvs']), help='Adapter used for the import')
+@click.option('--database', 'database_uri', default=None, help='SQLObject connection URI, a temporary SQLite database is used by default which allows only one writer at a time')
+@click.option('--workers', default='1,2,4', help='Comma separated numbers of worker processes which are compared')
+@click.option('--output', default=None, help='Write the results as JSON to this file')
+def scale(input_directory, adapter_type, database_uri, workers, output):
+
+    # set logging default configuration
+    logging.basicConfig(format="[%(levelname)s] %(asctime)s %(message)s", level=logging.INFO)
+
+    # stop times are generated by the workers only if they're stored for every trip
+    os.environ['VCC_VDV452_IMPORT_STORAGE'] = 'stoptimes'
+
+    benchmark = Vdv452Benchmark(input_directory, database_uri)
+    results: list = benchmark.run_workers(VvsAdapter if adapter_type == 'vvs' else DefaultAdapter, [int(w) for w in workers.split(',')])
+
+    if output is not None:
+        with open(output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,219 @@
+import functools
+import logging
+import os
+import sqlobject
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+from typing import Callable
+from typing import Iterator
+
+from vcclib import database
+from vcclib.metrics import peak_rss_mb
+from vcclib.metrics import reset_peak_rss
+from vcclib.model import ImportGeneration
+from vcclib.model import Stop
+from vcclib.model import Line
+from vcclib.model import StopPattern
+from vcclib.model import PatternStop
+from vcclib.model import Trip
+from vcclib.model import StopTime
+from vcclib.x10 import read_x10_file
+from vccvdv452import.adapter.default import DefaultAdapter
+
+
+class Vdv452Benchmark:
+
+    def __init__(self, input_directory: str, database_uri: str|None = None) -> None:
+        self.input_directory = input_directory
+        self.database_uri = database_uri
+
+        # stages of the import which are measured, each stage reports the number of rows
+        # it has processed, so that the throughput can be calculated
+        self.stages: dict = {
+            '_load_calendar_index': lambda result: len(result),
+            '_load_indexes': lambda result: len(result['trip_data']),
+            '_extract_stop_data': lambda result: len(result),
+            '_extract_line_data': lambda result: len(result),
+            '_validate_references': lambda result: len(result['gaps']),
+            '_extract_trip_data': lambda result: len(result)
+        }
+
+    def run_read_x10_files(self) -> list:
+        results: list = list()
+
+        # each file is read in a fresh process, so that the peak RSS is not influenced by previous runs
+        for x10filename in sorted(os.listdir(self.input_directory)):
+            if not x10filename.lower().endswith('.x10'):
+                continue
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                result: dict = executor.submit(_measure_read_x10_file, os.path.join(self.input_directory, x10filename)).result()
+
+            logging.info(f"Read {result['rows']} rows of {x10filename} in {result['seconds']:.3f}s ({result['rows_per_second']:.0f} rows/s, peak RSS {result['peak_rss_mb']:.1f} MB)")
+
+            results.append(result)
+
+        return results
+
+    def run_import(self, adapter: DefaultAdapter) -> dict:
+        results: list = list()
+
+        with self._database() as connection_uri:
+            logging.info(f"Running {type(adapter).__name__} against {connection_uri} ...")
+
+            start_time = time.perf_counter()
+            # the import is forced, since a previous run against the same database would be skipped otherwise
+            with self._measure_stages(type(adapter), results):
+                adapter.process(self.input_directory, force=True)
+
+            total_seconds = time.perf_counter() - start_time
+
+            counts: dict = {
+                'stops': Stop.select().count(),
+                'lines': Line.select().count(),
+                'trips': Trip.select().count(),
+                'stop_times': StopTime.select().count(),
+                'stop_patterns': StopPattern.select().count(),
+                'pattern_stops': PatternStop.select().count()
+            }
+
+        for result in results:
+            logging.info(f"Stage {result['stage']} processed {result['rows']} rows in {result['seconds']:.3f}s ({result['rows_per_second']:.0f} rows/s, peak RSS {result['peak_rss_mb']:.1f} MB)")
+
+        logging.info(f"Imported {counts['stops']} stops, {counts['lines']} lines, {counts['trips']} trips and {counts['stop_times']} stop times and {counts['stop_patterns']} stop patterns in {total_seconds:.3f}s")
+
+        return {
+            'adapter': type(adapter).__name__,
+            'seconds': total_seconds,
+            'stop_times_per_second': counts['stop_times'] / total_seconds if total_seconds > 0 else 0.0,
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_worker_rss_mb': peak_rss_mb(children=True),
+            'counts': counts,
+            'stages': results
+        }
+
+    def run_workers(self, adapter_class: type, worker_counts: list) -> list:
+        results: list = list()
+
+        # the number of cores available to this process may be limited below the number of CPUs, e.g. in a container
+        available_cores: int = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+
+        # the import is repeated for each number of workers, the trip generation is compared to the first run
+        for num_workers in worker_counts:
+            if num_workers > available_cores:
+                logging.warning(f"Running {num_workers} worker(s) on {available_cores} available core(s)")
+
+            os.environ['VCC_VDV452_IMPORT_WORKERS'] = str(num_workers)
+            result: dict = self.run_import(adapter_class())
+
+            trip_data_seconds: float = sum([s['seconds'] for s in result['stages'] if s['stage'] == 'extract_trip_data'])
+            results.append({
+                'workers': num_workers,
+                'available_cores': available_cores,
+                'seconds': result['seconds'],
+                'extract_trip_data_seconds': trip_data_seconds,
+                'speedup': results[0]['extract_trip_data_seconds'] / trip_data_seconds if len(results) > 0 and trip_data_seconds > 0 else 1.0,
+                'peak_worker_rss_mb': result['peak_worker_rss_mb'],
+                'counts': result['counts']
+            })
+
+        for result in results:
+            logging.info(f"{result['workers']} worker(s) generated {result['counts']['stop_times']} stop times in {result['extract_trip_data_seconds']:.3f}s (speedup {result['speedup']:.2f}, {result['available_cores']} available core(s))")
+
+        if any([result['counts'] != results[0]['counts'] for result in results]):
+            raise ValueError('Imports with a different number of workers resulted in different row counts')
+
+        return results
+
+    @contextmanager
+    def _database(self) -> Iterator[str]:
+        database_directory = None
+
+        # use a temporary SQLite database as stand-in for the MySQL database if no URI is given
+        connection_uri = self.database_uri
+        if connection_uri is None:
+            database_directory = tempfile.mkdtemp(prefix='vccbenchmark')
+            connection_uri = f"sqlite:{os.path.join(database_directory, 'vccdb.sqlite')}"
+
+        previous_connection = getattr(sqlobject.sqlhub, 'processConnection', None)
+        sqlobject.sqlhub.processConnection = sqlobject.connectionForURI(connection_uri)
+
+        try:
+            for model in (Stop, Line, StopPattern, PatternStop, Trip, StopTime, ImportGeneration):
+                model.createTable(ifNotExists=True)
+
+            yield connection_uri
+        finally:
+            database.connection().close()
+            sqlobject.sqlhub.processConnection = previous_connection
+
+            if database_directory is not None:
+                for entry in os.listdir(database_directory):
+                    os.remove(os.path.join(database_directory, entry))
+
+                os.rmdir(database_directory)
+
+    @contextmanager
+    def _measure_stages(self, adapter_class: type, results: list) -> Iterator[None]:
+        originals: dict = dict()
+
+        # stage methods are wrapped on class level, since the adapter instance may be pickled
+        # into worker processes, which wouldn't be possible with wrapped instance methods
+        for name, count in self.stages.items():
+            originals[name] = adapter_class.__dict__.get(name)
+            setattr(adapter_class, name, _measured(name, getattr(adapter_class, name), count, results))
+
+        try:
+            yield
+        finally:
+            for name, original in originals.items():
+                if original is None:
+                    delattr(adapter_class, name)
+                else:
+                    setattr(adapter_class, name, original)
+
+
+def _measured(stage: str, method: Callable, count: Callable, results: list) -> Callable:
+
+    @functools.wraps(method)
+    def measure(*args, **kwargs):
+        reset_peak_rss()
+
+        start_time = time.perf_counter()
+        result = method(*args, **kwargs)
+        seconds = time.perf_counter() - start_time
+
+        rows = count(result)
+        results.append({
+            'stage': stage.strip('_'),
+            'seconds': seconds,
+            'rows': rows,
+            'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+            'peak_rss_mb': peak_rss_mb()
+        })
+
+        return result
+
+    return measure
+
+def _measure_read_x10_file(filename: str) -> dict:
+    reset_peak_rss()
+
+    start_time = time.perf_counter()
+    x10_file = read_x10_file(filename, encoding='cp1252')
+    seconds = time.perf_counter() - start_time
+
+    rows = len(x10_file.records)
+
+    return {
+        'file': os.path.basename(filename),
+        'size_mb': os.path.getsize(filename) / (1024 * 1024),
+        'seconds': seconds,
+        'rows': rows,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb()
+    }
@@ -0,0 +1,341 @@
+import logging
+import os
+import random
+
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+from typing import Iterator
+
+from vcclib.x10 import X10File
+
+
+class Vdv452Generator:
+
+    def __init__(self, num_stops: int = 1000, num_lines: int = 50, num_trips: int = 5000, num_days: int = 14, route_length: int = 20, seed: int|None = None) -> None:
+        self.num_stops = num_stops
+        self.num_lines = num_lines
+        self.num_trips = num_trips
+        self.num_days = num_days
+        self.route_length = min(route_length, num_stops)
+
+        # daytypes are assigned by weekday, each daytype contains num_trips trips
+        self.daytypes = {1: 'Mo-Fr', 2: 'Sa', 3: 'So'}
+
+        # each time demand type is used for a part of the operation day
+        self.time_demand_types = {1: (0, 6 * 3600), 2: (6 * 3600, 20 * 3600), 3: (20 * 3600, 28 * 3600)}
+
+        self._random = random.Random(seed)
+
+        self._line_routes: dict = dict()
+        self._travel_times: dict = dict()
+
+    def generate(self, output_directory: str, trip_links: bool = False) -> dict:
+        if not os.path.exists(output_directory):
+            os.makedirs(output_directory)
+
+        self._create_network()
+
+        files: dict = {
+            'rec_ort.x10': self._write_stops,
+            'rec_lid.x10': self._write_lines,
+            'lid_verlauf.x10': self._write_line_routes,
+            'sel_fzt_feld.x10': self._write_time_demands,
+            'ort_hztf.x10': self._write_stop_waiting_times,
+            'rec_frt.x10': self._write_trips,
+            'rec_frt_hzt.x10': self._write_trip_waiting_times,
+            'firmenkalender.x10': self._write_calendar
+        }
+
+        if trip_links:
+            files['rec_frt_durchbindung.x10'] = self._write_trip_links
+
+        num_records: dict = dict()
+        for x10filename, writer in files.items():
+            logging.info(f"Generating {x10filename} ...")
+
+            num_records[x10filename] = writer(os.path.join(output_directory, x10filename))
+
+        return num_records
+
+    def _create_network(self) -> None:
+        self._line_routes = dict()
+        self._travel_times = dict()
+
+        # every line runs along a random walk through the network and back again,
+        # stops are numbered sequentially, so neighbouring stops are close to each other
+        for line_id in range(1, self.num_lines + 1):
+            stop_id = self._random.randint(1, self.num_stops)
+            route = [stop_id]
+
+            while len(route) < self.route_length:
+                stop_id = (stop_id + self._random.randint(1, 5) - 1) % self.num_stops + 1
+                if stop_id not in route:
+                    route.append(stop_id)
+
+            self._line_routes[(line_id, '1')] = route
+            self._line_routes[(line_id, '2')] = list(reversed(route))
+
+        for route in self._line_routes.values():
+            for stop_id, next_stop_id in zip(route, route[1:]):
+                if (stop_id, next_stop_id) not in self._travel_times:
+                    self._travel_times[(stop_id, next_stop_id)] = self._random.randint(60, 240)
+
+    def _write_stops(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+            for stop_id in range(1, self.num_stops + 1):
+                parent_id = (stop_id + 1) // 2
+
+                yield {
+                    'ONR_TYP_NR': 1,
+                    'ORT_NR': stop_id,
+                    'ORT_NAME': f"Stop {parent_id}/{stop_id % 2 + 1}",
+                    'ORT_REF_ORT': parent_id,
+                    'ORT_REF_ORT_NAME': f"Stop {parent_id}",
+                    'ORT_POS_LAENGE': self._create_coordinate(9.0 + stop_id * 0.0005),
+                    'ORT_POS_BREITE': self._create_coordinate(48.5 + (stop_id % 100) * 0.0005),
+                    'HST_NR_INTERNATIONAL': f"de:08111:{parent_id}:{stop_id % 2 + 1}"
+                }
+
+                # add a network point which is not a stop for every tenth stop
+                if stop_id % 10 == 0:
+                    yield {
+                        'ONR_TYP_NR': 2,
+                        'ORT_NR': stop_id,
+                        'ORT_NAME': f"Point {stop_id}",
+                        'ORT_REF_ORT': parent_id,
+                        'ORT_REF_ORT_NAME': f"Point {stop_id}",
+                        'ORT_POS_LAENGE': self._create_coordinate(9.0 + stop_id * 0.0005),
+                        'ORT_POS_BREITE': self._create_coordinate(48.5),
+                        'HST_NR_INTERNATIONAL': ''
+                    }
+
+        return self._write_x10_file(filename, 'rec_ort', [
+            ('ONR_TYP_NR', 'num', '2.0'),
+            ('ORT_NR', 'num', '6.0'),
+            ('ORT_NAME', 'char', '40'),
+            ('ORT_REF_ORT', 'num', '6.0'),
+            ('ORT_REF_ORT_NAME', 'char', '40'),
+            ('ORT_POS_LAENGE', 'num', '10.0'),
+            ('ORT_POS_BREITE', 'num', '10.0'),
+            ('HST_NR_INTERNATIONAL', 'char', '30')
+        ], records())
+
+    def _write_lines(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+            for line_id, line_variant_id in self._line_routes.keys():
+                yield {
+                    'LI_NR': line_id,
+                    'STR_LI_VAR': line_variant_id,
+                    'LI_RI_NR': int(line_variant_id),
+                    'LIDNAME': f"Line {line_id}",
+                    'LI_KUERZEL': str(line_id),
+                    'LinienID': f"de:vvs:{line_id}"
+                }
+
+        return self._write_x10_file(filename, 'rec_lid', [
+            ('LI_NR', 'num', '6.0'),
+            ('STR_LI_VAR', 'char', '6'),
+            ('LI_RI_NR', 'num', '3.0'),
+            ('LIDNAME', 'char', '40'),
+            ('LI_KUERZEL', 'char', '6'),
+            ('LinienID', 'char', '30')
+        ], records())
+
+    def _write_line_routes(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+            for (line_id, line_variant_id), route in self._line_routes.items():
+                for s, stop_id in enumerate(route):
+                    yield {
+                        'LI_NR': line_id,
+                        'STR_LI_VAR': line_variant_id,
+                        'LI_LFD_NR': s + 1,
+                        'ONR_TYP_NR': 1,
+                        'ORT_NR': stop_id
+                    }
+
+        return self._write_x10_file(filename, 'lid_verlauf', [
+            ('LI_NR', 'num', '6.0'),
+            ('STR_LI_VAR', 'char', '6'),
+            ('LI_LFD_NR', 'num', '3.0'),
+            ('ONR_TYP_NR', 'num', '2.0'),
+            ('ORT_NR', 'num', '6.0')
+        ], records())
+
+    def _write_time_demands(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+            for tdt_id in self.time_demand_types.keys():
+                for (stop_id, next_stop_id), travel_time in self._travel_times.items():
+                    yield {
+                        'FGR_NR': tdt_id,
+                        'ONR_TYP_NR': 1,
+                        'ORT_NR': stop_id,
+                        'SEL_ZIEL_TYP': 1,
+                        'SEL_ZIEL': next_stop_id,
+                        'SEL_FZT': travel_time + (tdt_id - 1) * 30
+                    }
+
+        return self._write_x10_file(filename, 'sel_fzt_feld', [
+            ('FGR_NR', 'num', '9.0'),
+            ('ONR_TYP_NR', 'num', '2.0'),
+            ('ORT_NR', 'num', '6.0'),
+            ('SEL_ZIEL_TYP', 'num', '2.0'),
+            ('SEL_ZIEL', 'num', '6.0'),
+            ('SEL_FZT', 'num', '6.0')
+        ], records())
+
+    def _write_stop_waiting_times(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+            for tdt_id in self.time_demand_types.keys():
+                for stop_id in range(1, self.num_stops + 1, 7):
+                    yield {
+                        'FGR_NR': tdt_id,
+                        'ONR_TYP_NR': 1,
+                        'ORT_NR': stop_id,
+                        'HP_HZT': 30
+                    }
+
+        return self._write_x10_file(filename, 'ort_hztf', [
+            ('FGR_NR', 'num', '9.0'),
+            ('ONR_TYP_NR', 'num', '2.0'),
+            ('ORT_NR', 'num', '6.0'),
+            ('HP_HZT', 'num', '6.0')
+        ], records())
+
+    def _write_trips(self, filename: str) -> int:
+        return self._write_x10_file(filename, 'rec_frt', [
+            ('FRT_FID', 'num', '10.0'),
+            ('FRT_START', 'num', '6.0'),
+            ('LI_NR', 'num', '6.0'),
+            ('TAGESART_NR', 'num', '3.0'),
+            ('FGR_NR', 'num', '9.0'),
+            ('STR_LI_VAR', 'char', '6')
+        ], self._create_trips())
+
+    def _write_trip_waiting_times(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+            for trip in self._create_trips():
+                if trip['FRT_FID'] % 10 == 0:
+                    route = self._line_routes[(trip['LI_NR'], trip['STR_LI_VAR'])]
+
+                    yield {
+                        'FRT_FID': trip['FRT_FID'],
+                        'ONR_TYP_NR': 1,
+                        'ORT_NR': route[len(route) // 2],
+                        'FRT_HZT_ZEIT': 60
+                    }
+
+        return self._write_x10_file(filename, 'rec_frt_hzt', [
+            ('FRT_FID', 'num', '10.0'),
+            ('ONR_TYP_NR', 'num', '2.0'),
+            ('ORT_NR', 'num', '6.0'),
+            ('FRT_HZT_ZEIT', 'num', '6.0')
+        ], records())
+
+    def _write_trip_links(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+            last_trips: dict = dict()
+
+            # trips of a line are linked alternately to the next trip in the opposite direction
+            for trip in self._create_trips():
+                key = (trip['TAGESART_NR'], trip['LI_NR'])
+                if key in last_trips and last_trips[key]['STR_LI_VAR'] != trip['STR_LI_VAR']:
+                    yield {
+                        'FRT_FID1': last_trips[key]['FRT_FID'],
+                        'FRT_FID2': trip['FRT_FID']
+                    }
+
+                    del last_trips[key]
+                else:
+                    last_trips[key] = trip
+
+        return self._write_x10_file(filename, 'rec_frt_durchbindung', [
+            ('FRT_FID1', 'num', '10.0'),
+            ('FRT_FID2', 'num', '10.0')
+        ], records())
+
+    def _write_calendar(self, filename: str) -> int:
+        def records() -> Iterator[dict]:
+
+            # calendar starts one day before today, so that the import finds the current operation day
+            start_date = date.today() - timedelta(days=1)
+            for d in range(0, self.num_days):
+                operation_day = start_date + timedelta(days=d)
+
+                yield {
+                    'BETRIEBSTAG': int(operation_day.strftime('%Y%m%d')),
+                    'BETRIEBSTAG_TEXT': operation_day.strftime('%d.%m.%Y'),
+                    'TAGESART_NR': min(operation_day.isoweekday() - 4, 3) if operation_day.isoweekday() > 5 else 1
+                }
+
+        return self._write_x10_file(filename, 'firmenkalender', [
+            ('BETRIEBSTAG', 'num', '8.0'),
+            ('BETRIEBSTAG_TEXT', 'char', '40'),
+            ('TAGESART_NR', 'num', '3.0')
+        ], records())
+
+    def _create_trips(self) -> Iterator[dict]:
+        line_variants = list(self._line_routes.keys())
+
+        # trips are spread evenly over all line variants between 04:00 and 01:00
+        trip_id = 0
+        for daytype in self.daytypes.keys():
+            for t in range(0, self.num_trips):
+                line_id, line_variant_id = line_variants[t % len(line_variants)]
+                start_time = 4 * 3600 + (t // len(line_variants)) * (21 * 3600) // max(self.num_trips // len(line_variants), 1)
+
+                trip_id = trip_id + 1
+
+                yield {
+                    'FRT_FID': trip_id,
+                    'FRT_START': start_time,
+                    'LI_NR': line_id,
+                    'TAGESART_NR': daytype,
+                    'FGR_NR': next(tdt_id for tdt_id, (s, e) in self.time_demand_types.items() if s <= start_time < e),
+                    'STR_LI_VAR': line_variant_id
+                }
+
+    def _create_coordinate(self, value: float) -> int:
+
+        # coordinates are written in VDV452 format DDDMMSSsss
+        degrees = int(value)
+        minutes = int((value - degrees) * 60)
+        seconds = (value - degrees - minutes / 60) * 3600
+
+        return degrees * 10000000 + minutes * 100000 + int(seconds * 1000)
+
+    def _write_x10_file(self, filename: str, table_name: str, columns: list, records: Iterator[dict]) -> int:
+        now = datetime.now()
+
+        x10_file = X10File()
+        x10_file.encoding = 'cp1252'
+        x10_file.null_value = ''
+
+        x10_file.date_format = 'DD.MM.YYYY'
+        x10_file.time_format = 'HH:MM:SS'
+        x10_file.representation = 'free'
+        x10_file.creator_name = 'VdvCountCore'
+        x10_file.creation_date = now.strftime('%d.%m.%Y')
+        x10_file.creation_time = now.strftime('%H:%M:%S')
+        x10_file.charset = 'ISO8859-1'
+        x10_file.file_version = '1.4'
+        x10_file.interface_version = '1.4'
+        x10_file.data_version = 'synthetic'
+        x10_file.file_format = ''
+        x10_file.table_name = table_name
+
+        for cname, dtype, dsize in columns:
+            x10_file.attributes.append(cname)
+            x10_file.datatypes.append({'type': dtype, 'size': dsize})
+
+        # records are counted while being written, so that they're never materialized as a whole
+        num_records = 0
+        def counted_records() -> Iterator[dict]:
+            nonlocal num_records
+            for record in records:
+                num_records = num_records + 1
+                yield record
+
+        x10_file.write_records(counted_records(), filename)
+
+        return num_records
@@ -1,14 +1,22 @@
+import codecs
 import duckdb
 import json
 import logging
 import os
+import pyarrow
+import tempfile
 
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Any
 from typing import Dict
+from typing import Iterator
 from typing import List
 
 from .common import is_debug
+from .x10 import X10File
+from .x10 import read_x10_header
+from .x10 import x10_type_of
 
 class DuckDB:
 
@@ -164,4 +172,135 @@ class DuckDB:
             return type_mapping.get(json_type, "TEXT")
 
     def close(self):
-        self._ddb.close()
\ No newline at end of file
+        self._ddb.close()
+
+
+class X10DuckDB:
+
+    def __init__(self, database: str = ':memory:'):
+        self._ddb = duckdb.connect(database)
+
+    def load_x10_directory(self, directory: str, null_value: str = 'NULL', encoding: str = 'utf-8') -> List[str]:
+        table_names: List[str] = list()
+
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith('.x10'):
+                logging.info(f"Loading file {filename} ...")
+                table_names.append(self.load_x10_file(os.path.join(directory, filename), None, null_value, encoding))
+
+        return table_names
+
+    def load_x10_file(self, filename: str, table_name: str|None = None, null_value: str = 'NULL', encoding: str = 'utf-8') -> str:
+        x10_header: X10File = read_x10_header(filename, encoding)
+
+        if table_name is None:
+            table_name = x10_header.table_name
+
+        self._ddb.execute(self._x10_header_to_create_statement(table_name, x10_header))
+
+        # load rec rows using the native CSV reader of DuckDB, all values are read as text first 
+        # and then converted into the column types of the table
+        with self._utf8_source(filename, encoding) as (source_filename, source_encoding):
+            num_records = self._ddb.execute(
+                self._x10_header_to_insert_statement(table_name, x10_header, source_filename, source_encoding), 
+                (null_value,)
+            ).fetchone()[0]
+
+        num_records_expected = self._read_x10_record_count(filename, encoding)
+        if num_records_expected is None:
+            logging.error(f"no end record found in {filename}, file may be truncated")
+        elif not num_records == num_records_expected:
+            logging.error(f"number of records not matching, expected {num_records_expected} but found {num_records}")
+
+        return table_name
+    
+    def execute(self, sql_statement: str, parameters: tuple = tuple()) -> duckdb.DuckDBPyConnection:
+        
+        # log SQL statement in debugging mode
+        if is_debug():
+            logging.info(sql_statement)
+
+        return self._ddb.execute(sql_statement, parameters)
+
+    def _x10_header_to_create_statement(self, table_name: str, x10_header: X10File) -> str:
+        columns = []
+
+        for attribute, datatype in zip(x10_header.attributes, x10_header.datatypes):
+            duckdb_type = self._resolve_x10_type(x10_header, datatype)
+            columns.append(f"\"{attribute}\" {duckdb_type}")
+
+        columns_sql = ",\n  ".join(columns)
+        create_stmt = f"CREATE OR REPLACE TABLE \"{table_name}\" (\n  {columns_sql}\n);"
+
+        return create_stmt
+    
+    def _x10_header_to_insert_statement(self, table_name: str, x10_header: X10File, filename: str, encoding: str) -> str:
+
+        # header rows like mod or src may have more values than the table has columns
+        num_csv_columns = max(len(x10_header.attributes) + 1, 4)
+        csv_columns = ', '.join([f"'c{i}': 'VARCHAR'" for i in range(num_csv_columns)])
+
+        values = []
+        for i, datatype in enumerate(x10_header.datatypes):
+            duckdb_type = self._resolve_x10_type(x10_header, datatype)
+            value = f"trim(trim(c{i + 1}), '\"')"
+
+            # char and boolean values are kept as they are, numeric values matching the NULL value are converted to NULL
+            if duckdb_type == 'VARCHAR':
+                values.append(f"COALESCE({value}, '')")
+            else:
+                values.append(f"CAST(NULLIF({value}, $1) AS {duckdb_type})")
+
+        values_sql = ",\n  ".join(values)
+        insert_stmt = (
+            f"INSERT INTO \"{table_name}\" SELECT\n  {values_sql}\n"
+            f"FROM read_csv('{filename.replace(chr(39), chr(39) * 2)}', delim=';', quote='\"', escape='\"', header=false, auto_detect=false, "
+            f"null_padding=true, strict_mode=false, encoding='{encoding}', columns={{{csv_columns}}})\n"
+            f"WHERE trim(c0) = 'rec';"
+        )
+
+        return insert_stmt
+    
+    def _resolve_x10_type(self, x10_header: X10File, datatype: dict) -> str:
+        type_mapping = {
+            pyarrow.int32(): 'INTEGER',
+            pyarrow.int64(): 'BIGINT',
+            pyarrow.float64(): 'DOUBLE',
+            pyarrow.string(): 'VARCHAR'
+        }
+
+        # use the same types as the columnar X10 reader does
+        return type_mapping[x10_type_of(datatype['type'], datatype['size'])]
+    
+    def _read_x10_record_count(self, filename: str, encoding: str) -> int|None:
+        with open(filename, 'rb') as x10_file:
+            x10_file.seek(max(0, os.path.getsize(filename) - 4096))
+            x10_tail = x10_file.read().decode(encoding, errors='ignore')
+
+        for line in reversed(x10_tail.splitlines()):
+            if line.startswith('end'):
+                return int(line.split(';')[1])
+            
+        return None
+    
+    @contextmanager
+    def _utf8_source(self, filename: str, encoding: str) -> Iterator[tuple]:
+        encoding = codecs.lookup(encoding).name
+
+        # DuckDB reads UTF-8 and latin-1 natively, all other encodings (e.g. cp1252) are 
+        # transcoded into a temporary UTF-8 file first in chunks
+        if encoding == 'utf-8':
+            yield filename, 'utf-8'
+        elif encoding == 'iso8859-1':
+            yield filename, 'latin-1'
+        else:
+            with tempfile.TemporaryDirectory() as temp_directory:
+                temp_filename = os.path.join(temp_directory, os.path.basename(filename))
+                with open(filename, 'r', newline='', encoding=encoding) as source_file, open(temp_filename, 'w', newline='', encoding='utf-8') as temp_file:
+                    for chunk in iter(lambda: source_file.read(1024 * 1024), ''):
+                        temp_file.write(chunk)
+
+                yield temp_filename, 'utf-8'
+
+    def close(self):
+        self._ddb.close()
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import time
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+# resource is not available on Windows, the peak RSS is reported as 0 there
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_run: dict|None = None
+_stack: list = list()
+
+def start(name: str) -> None:
+    global _run
+
+    _run = {
+        'name': name,
+        'status': None,
+        'started': datetime.now(),
+        'start_time': time.perf_counter(),
+        'peak_rss_mb': 0.0,
+        'stages': dict(),
+        'counters': dict()
+    }
+
+    _stack.clear()
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+
+    # stages are a no-op if there's no run started, e.g. when an adapter is used by the benchmark
+    if _run is None:
+        yield
+        return
+
+    # nested stages reset the peak RSS as well, so the peak seen so far is handed to the enclosing stage before
+    if len(_stack) > 0:
+        _stack[-1]['peak_rss_mb'] = max(_stack[-1]['peak_rss_mb'], peak_rss_mb())
+
+    reset_peak_rss()
+
+    current: dict = {'peak_rss_mb': 0.0}
+    _stack.append(current)
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start_time
+        current['peak_rss_mb'] = max(current['peak_rss_mb'], peak_rss_mb())
+
+        _stack.pop()
+        if len(_stack) > 0:
+            _stack[-1]['peak_rss_mb'] = max(_stack[-1]['peak_rss_mb'], current['peak_rss_mb'])
+
+        # stages which run several times, like transforming each trip of an export, are aggregated
+        if name not in _run['stages']:
+            _run['stages'][name] = {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'peak_rss_mb': 0.0}
+
+        _run['stages'][name]['calls'] += 1
+        _run['stages'][name]['seconds'] += seconds
+        _run['stages'][name]['max_seconds'] = max(_run['stages'][name]['max_seconds'], seconds)
+        _run['stages'][name]['peak_rss_mb'] = max(_run['stages'][name]['peak_rss_mb'], current['peak_rss_mb'])
+
+        _run['peak_rss_mb'] = max(_run['peak_rss_mb'], current['peak_rss_mb'])
+
+def count(name: str, value: int = 1) -> None:
+    if _run is not None:
+        _run['counters'][name] = _run['counters'].get(name, 0) + value
+
+def status(value: str) -> None:
+    if _run is not None:
+        _run['status'] = value
+
+def finish() -> dict|None:
+    global _run
+
+    if _run is None:
+        return None
+
+    summary: dict = {
+        'name': _run['name'],
+        'status': _run['status'] if _run['status'] is not None else 'success',
+        'started': _run['started'].isoformat(),
+        'finished': datetime.now().isoformat(),
+        'seconds': time.perf_counter() - _run['start_time'],
+        'peak_rss_mb': max(_run['peak_rss_mb'], peak_rss_mb()),
+        'peak_worker_rss_mb': peak_rss_mb(children=True),
+        'stages': [{'stage': name, **values} for name, values in _run['stages'].items()],
+        'counters': _run['counters']
+    }
+
+    metrics_filename = f"{_run['name']}_{_run['started'].strftime('%Y%m%d%H%M%S')}.json"
+
+    _run = None
+    _stack.clear()
+
+    for s in summary['stages']:
+        logging.info(f"Stage {s['stage']} took {s['seconds']:.3f}s in {s['calls']} call(s), peak RSS {s['peak_rss_mb']:.1f} MB")
+
+    # summaries are written as one JSON file per run, so they can be collected and compared across runs
+    metrics_directory = os.getenv('VCC_METRICS_DIRECTORY', None)
+    if metrics_directory is not None and metrics_directory.strip() != '':
+        os.makedirs(metrics_directory, exist_ok=True)
+
+        metrics_filename = os.path.join(metrics_directory, metrics_filename)
+        with open(metrics_filename, 'w') as metrics_file:
+            json.dump(summary, metrics_file, indent=4)
+
+        logging.info(f"Written metrics to {metrics_filename}")
+
+    return summary
+
+def reset_peak_rss() -> None:
+    # resetting the peak RSS is only supported on Linux, elsewhere the peak of the whole process is reported
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+def peak_rss_mb(children: bool = False) -> float:
+    if not children:
+        try:
+            with open('/proc/self/status') as status_file:
+                for line in status_file:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+
+    if resource is None:
+        return 0.0
+
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss / 1024
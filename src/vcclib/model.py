@@ -1,51 +1,75 @@
-import re
+import threading
 
-from difflib import SequenceMatcher
 from sqlobject import *
 from sqlobject.sqlbuilder import Table, Select, LEFTJOIN
 
 from vcclib import database
 
+# search indexes of Stop.lookup by import generation and only_starting_stations
+_station_indexes: dict = dict()
+_station_indexes_lock = threading.Lock()
+
+class SOBigForeignKey(SOForeignKey):
+
+    # foreign keys of tables with 64 bit IDs must have the same type as the referenced ID
+    def _sqlType(self):
+        return 'BIGINT'
+
+class BigForeignKey(ForeignKey):
+    baseClass = SOBigForeignKey
+
 class Stop(SQLObject):
+
+    # IDs are never reused across imports, so they're growing with every import
+    class sqlmeta:
+        idSize = 'BIG'
+
     stop_id = IntCol()
     name = StringCol()
     latitude = FloatCol()
     longitude = FloatCol()
     international_id = StringCol(default=None)
     parent_id = IntCol()
+    starting_trips = BoolCol(default=False)
+
+    # names are TEXT columns, so MySQL indexes only a prefix of them
+    parent_index = DatabaseIndex('parent_id', {'column': 'name', 'length': 100})
+    starting_index = DatabaseIndex('starting_trips', 'parent_id')
 
     @classmethod
     def lookup(cls, lookup_name:str, only_starting_stations:bool = False):
-        def normalize(input:str) -> str:
-            normalized = input.lower().strip()
-            normalized = re.sub(r"[^a-z0-9äöüß\s]", '', normalized)
-            replacements = {
-                'hbf': 'hauptbahnhof', 
-                'bf': 'bahnhof'
-            }
-            
-            for short, full in replacements.items():
-                normalized = normalized.replace(short, full)
-
-            return normalized
-        
-        # container for results
-        result = list()
+        # numpy is required by the API only, the importers are using the models without it
+        from vcclib.search import StationIndex
+
+        # the search index is built once per import generation and kept until the next import
+        key = (ImportGeneration.current(), only_starting_stations)
+
+        # requests are running in multiple threads, the lock is held while building, so that
+        # concurrent requests wait for the index instead of building it again
+        with _station_indexes_lock:
+            if key not in _station_indexes:
+                for k in [k for k in _station_indexes.keys() if k[0] != key[0]]:
+                    del _station_indexes[k]
+
+                _station_indexes[key] = StationIndex(cls.stations(only_starting_stations))
 
+            station_index = _station_indexes[key]
+
+        return station_index.lookup(lookup_name)
+
+    @classmethod
+    def stations(cls, only_starting_stations:bool = False) -> list:
         # build and run query on DB
         # if only_starting_stations is True, restrict the query to all stations which
-        # have at least one starting trip on its stops
+        # have at least one starting trip on its stops, these stops are marked by the import
         if only_starting_stations:
-            
-            stops_with_starting_trips: list[int] = [st.stop.stop_id for st in StopTime.select(StopTime.q.sequence == 1)]
-
             query = Select((
                 Stop.q.parent_id, 
                 Stop.q.name, 
                 f"AVG({Stop.q.latitude})", 
                 f"AVG({Stop.q.longitude})"
             ), 
-            where=IN(Stop.q.stop_id, stops_with_starting_trips),
+            where=Stop.q.starting_trips == True,
             groupBy=[Stop.q.parent_id, Stop.q.name])
         else:
             query = Select((
@@ -57,55 +81,203 @@ class Stop(SQLObject):
         
         query = database.connection().sqlrepr(query)
 
-        # create result set and order by similarity
-        # only the first 30 results are returned
-        for s in database.connection().queryAll(query):
-            obj = dict()
-            obj['parent_id'] = s[0]
-            obj['name'] = s[1]
-            obj['latitude'] = s[2]
-            obj['longitude'] = s[3]
-            obj['similarity'] = SequenceMatcher(None, normalize(s[1]), normalize(lookup_name)).ratio()
+        return list(database.connection().queryAll(query))
 
-            if obj['similarity'] > 0.5:
-                result.append(obj)
+    @classmethod
+    def departures(cls, parent_stop_id:int, only_starting_trips:bool=False, from_timestamp:int|None=None, limit:int|None=None, cursor:str|None=None) -> list:
+        line_columns = [column.name for column in Line.sqlmeta.columnList]
 
-        return sorted(result, key=lambda s: s['similarity'], reverse=True)[:30]
+        # stop times and the stop times of trips imported in pattern mode are selected together with their stop, trip 
+        # and line in one query, so there're no further queries for each departure, departures are ordered by their 
+        # departure timestamp, the trip and the sequence, which is used as cursor for the next page as well
+        def select(stop_time_table, trip_condition, departure_timestamp, arrival_timestamp, sequence):
+            conditions = [
+                Stop.q.parent_id == parent_stop_id,
+                stop_time_table.stop == Stop.q.id,
+                trip_condition,
+                Trip.q.line == Line.q.id,
+                departure_timestamp != None
+            ]
 
-    @classmethod
-    def departures(cls, parent_stop_id:int, only_starting_trips:bool=False):
-        stops = cls.select(Stop.q.parent_id == parent_stop_id)
+            if only_starting_trips:
+                conditions.append(Stop.q.starting_trips == True)
+                conditions.append(sequence == 1)
 
-        if only_starting_trips:
-            return StopTime.select((IN(StopTime.q.stop, stops)) & (StopTime.q.departure_timestamp != None) & (StopTime.q.sequence == 1)).orderBy(StopTime.q.departure_timestamp)
-        else:
-            return StopTime.select((IN(StopTime.q.stop, stops)) & (StopTime.q.departure_timestamp != None)).orderBy(StopTime.q.departure_timestamp)
+            if from_timestamp is not None:
+                conditions.append(departure_timestamp >= from_timestamp)
+
+            if cursor is not None:
+                cursor_departure_timestamp, cursor_trip, cursor_sequence = [int(c) for c in cursor.split('-')]
+                conditions.append(OR(
+                    departure_timestamp > cursor_departure_timestamp,
+                    AND(departure_timestamp == cursor_departure_timestamp, Trip.q.id > cursor_trip),
+                    AND(departure_timestamp == cursor_departure_timestamp, Trip.q.id == cursor_trip, sequence > cursor_sequence)
+                ))
+
+            return database.connection().sqlrepr(Select((
+                departure_timestamp,
+                Trip.q.id,
+                sequence,
+                arrival_timestamp,
+                Stop.q.stop_id,
+                Trip.q.trip_id,
+                Trip.q.direction,
+                Trip.q.headsign,
+                Trip.q.international_id,
+                Trip.q.operation_day,
+                *[getattr(Line.q, c) for c in line_columns]
+            ), where=AND(*conditions)))
+
+        stop_times_query = select(
+            StopTime.q, 
+            StopTime.q.trip == Trip.q.id, 
+            StopTime.q.departure_timestamp, 
+            StopTime.q.arrival_timestamp, 
+            StopTime.q.sequence
+        )
+
+        # timetables imported in pattern mode don't have any stop times, their departures are expanded from the patterns instead
+        pattern_stops_query = select(
+            PatternStop.q, 
+            PatternStop.q.pattern == Trip.q.pattern, 
+            Trip.q.start_timestamp + PatternStop.q.departure_offset, 
+            Trip.q.start_timestamp + PatternStop.q.arrival_offset, 
+            PatternStop.q.sequence
+        )
+
+        query = f"{stop_times_query} UNION ALL {pattern_stops_query} ORDER BY 1, 2, 3"
+        if limit is not None:
+            query = f"{query} LIMIT {int(limit)}"
+
+        result = list()
+        for d in database.connection().queryAll(query):
+            result.append({
+                'stop_id': d[4],
+                'line': dict(zip(line_columns, d[10:])),
+                'trip_id': d[5],
+                'direction': d[6],
+                'headsign': d[7],
+                'international_id': d[8],
+                'operation_day': d[9],
+                'arrival_timestamp': d[3],
+                'departure_timestamp': d[0],
+                'sequence': d[2],
+                'cursor': f"{d[0]}-{d[1]}-{d[2]}"
+            })
+
+        return result
 
 class Line(SQLObject):
+
+    class sqlmeta:
+        idSize = 'BIG'
+
     line_id = IntCol()
     name = StringCol()
     international_id = StringCol(default=None)
     type = StringCol(default=None)
 
 class Trip(SQLObject):
+
+    class sqlmeta:
+        idSize = 'BIG'
+
     trip_id = IntCol()
-    line = ForeignKey('Line', cascade=True)
+    line = BigForeignKey('Line', cascade=True)
     direction = IntCol()
     headsign = StringCol(default=None)
     international_id = StringCol(default=None)
     operation_day = IntCol()
     next_trip_id = IntCol(default=None)
+    pattern = BigForeignKey('StopPattern', default=None, cascade=True)
+    start_timestamp = IntCol(default=None)
+
+    trip_index = DatabaseIndex('trip_id', 'operation_day')
+    pattern_index = DatabaseIndex('pattern', 'start_timestamp')
+
+    @classmethod
+    def find(cls, trip_id: int, operation_day: int, explicit_operation_day: bool = False):
+        trips = list(cls.select(cls.q.trip_id == trip_id).orderBy(cls.q.operation_day))
+
+        # use the trip of the requested operation day or the next one, the last trip available
+        # is used only if the operation day wasn't requested explicitly
+        fallback = trips[-1] if len(trips) > 0 and not explicit_operation_day else None
+
+        return next((t for t in trips if t.operation_day >= operation_day), fallback)
 
     def stop_times(self):
+        if self.patternID is not None:
+            return self.pattern.stop_times(self)
+
         return StopTime.select(StopTime.q.trip == self).orderBy(StopTime.q.sequence)
 
+class StopPattern(SQLObject):
+
+    class sqlmeta:
+        idSize = 'BIG'
+
+    line_id = IntCol()
+    line_variant = StringCol()
+    time_demand_type = IntCol()
+
+    def stop_times(self, trip: Trip) -> list:
+        return [PatternStopTime(trip, ps) for ps in PatternStop.select(PatternStop.q.pattern == self).orderBy(PatternStop.q.sequence)]
+
+class PatternStop(SQLObject):
+
+    class sqlmeta:
+        idSize = 'BIG'
+
+    pattern = BigForeignKey('StopPattern', cascade=True)
+    stop = BigForeignKey('Stop', cascade=True)
+    arrival_offset = IntCol()
+    departure_offset = IntCol(default=None)
+    sequence = IntCol()
+
+    pattern_index = DatabaseIndex('pattern', 'sequence')
+    stop_index = DatabaseIndex('stop', 'departure_offset')
+    sequence_index = DatabaseIndex('sequence', 'stop')
+
+class PatternStopTime:
+
+    # stop times of trips imported in pattern mode are expanded on demand and provide the same attributes as StopTime
+    def __init__(self, trip: Trip, pattern_stop: PatternStop) -> None:
+        self.trip = trip
+        self.stop = pattern_stop.stop
+        self.arrival_timestamp = trip.start_timestamp + pattern_stop.arrival_offset
+        self.departure_timestamp = trip.start_timestamp + pattern_stop.departure_offset if pattern_stop.departure_offset is not None else None
+        self.sequence = pattern_stop.sequence
+
 class StopTime(SQLObject):
-    trip = ForeignKey('Trip', cascade=True)
-    stop = ForeignKey('Stop', cascade=True)
+
+    class sqlmeta:
+        idSize = 'BIG'
+
+    trip = BigForeignKey('Trip', cascade=True)
+    stop = BigForeignKey('Stop', cascade=True)
     arrival_timestamp = IntCol()
     departure_timestamp = IntCol(default=None)
     sequence = IntCol()
 
+    trip_index = DatabaseIndex('trip', 'sequence')
+    stop_index = DatabaseIndex('stop', 'departure_timestamp')
+    sequence_index = DatabaseIndex('sequence', 'stop')
+
+class ImportGeneration(SQLObject):
+    generation = IntCol()
+    operation_day = IntCol()
+    created_timestamp = IntCol()
+    fingerprint = StringCol(length=64, default=None)
+    manifest = StringCol(default=None)
+
+    @classmethod
+    def current(cls):
+        return cls.select().max(ImportGeneration.q.generation)
+
+    @classmethod
+    def latest(cls):
+        return cls.select().orderBy('-generation').limit(1).getOne(None)
+
 class MasterDataVehicle(SQLObject):
     name = StringCol()
     num_doors = IntCol()
@@ -0,0 +1,151 @@
+import bisect
+import numpy
+import re
+import sys
+
+from difflib import SequenceMatcher
+
+
+def normalize(input: str) -> str:
+    normalized = input.lower().strip()
+    normalized = re.sub(r"[^a-z0-9äöüß\s]", '', normalized)
+    replacements = {
+        'hbf': 'hauptbahnhof',
+        'bf': 'bahnhof'
+    }
+
+    for short, full in replacements.items():
+        normalized = normalized.replace(short, full)
+
+    return normalized
+
+# minimum length bounds of the bands of stations which are scanned one after the other by StationIndex.lookup,
+# the last band contains all stations which can have a similarity above 0.5
+BAND_LENGTH_BOUNDS = [0.8, 0.65, 0.5]
+
+class StationIndex:
+
+    def __init__(self, stations: list) -> None:
+        self._stations = stations
+
+        # names are normalized once when the index is built, the number of each character
+        # per name is kept as a matrix with one row per station and one column per character
+        self._names: list = [normalize(s[1]) for s in stations]
+        self._characters: dict = {c: i for i, c in enumerate(sorted(set(''.join(self._names))))}
+
+        # rows are ordered by the length of the names, so the stations of the same length are
+        # a continuous range of rows which can be scanned on their own
+        lengths = numpy.array([len(n) for n in self._names], dtype=numpy.int64)
+        self._order = numpy.argsort(lengths, kind='stable')
+        self._lengths = lengths[self._order]
+
+        self._bucket_lengths, self._bucket_starts = numpy.unique(self._lengths, return_index=True)
+        self._bucket_ends = numpy.append(self._bucket_starts[1:], len(self._lengths))
+
+        self._character_counts = numpy.zeros((len(self._names), len(self._characters)), dtype=numpy.int32)
+        for row, i in enumerate(self._order.tolist()):
+            for c in self._names[i]:
+                self._character_counts[row, self._characters[c]] += 1
+
+    def lookup(self, lookup_name: str, limit: int = 30) -> list:
+        normalized_lookup_name = normalize(lookup_name)
+        lookup_length = len(normalized_lookup_name)
+
+        lookup_counts = numpy.zeros(len(self._characters), dtype=numpy.int32)
+        for c in normalized_lookup_name:
+            if c in self._characters:
+                lookup_counts[self._characters[c]] += 1
+
+        # the similarity of two names can't exceed 2 * min(la, lb) / (la + lb), so the stations are scanned
+        # in bands of names with a similar length, the band grows until no station outside of it can reach
+        # the similarity of the last result, stations outside of the last band can never be a result
+        totals = self._bucket_lengths + lookup_length
+        length_bounds = numpy.divide(2.0 * numpy.minimum(self._bucket_lengths, lookup_length), totals, out=numpy.ones(len(totals)), where=totals > 0)
+
+        # the lookup name is the second sequence, so SequenceMatcher caches its details for all candidates
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(normalized_lookup_name)
+
+        # container for results
+        result = list()
+        similarities = list()
+
+        # rows of the stations which were scanned already, and the candidates which were
+        # deferred to a later band as stations outside of the band may have a higher upper bound
+        scanned_start, scanned_end = 0, 0
+        deferred_rows = numpy.zeros(0, dtype=numpy.int64)
+        deferred_bounds = numpy.zeros(0)
+
+        for min_length_bound in BAND_LENGTH_BOUNDS:
+            # the length bound is increasing up to the length of the lookup name and decreasing after it,
+            # so the buckets within the band are a continuous range of rows
+            band = numpy.nonzero(length_bounds > min_length_bound)[0]
+            if len(band) == 0:
+                ranges = list()
+            elif scanned_end > scanned_start:
+                ranges = [(int(self._bucket_starts[band[0]]), scanned_start), (scanned_end, int(self._bucket_ends[band[-1]]))]
+            else:
+                ranges = [(int(self._bucket_starts[band[0]]), int(self._bucket_ends[band[-1]]))]
+
+            if len(ranges) > 0:
+                scanned_start, scanned_end = ranges[0][0], ranges[-1][1]
+
+            # the quick ratio is a tighter upper bound of the similarity, it's the share of common characters
+            # regardless of their order, so it's calculated for all new stations of the band at once
+            rows = numpy.concatenate([numpy.arange(start, end) for start, end in ranges] + [numpy.zeros(0, dtype=numpy.int64)])
+            common = numpy.concatenate([numpy.minimum(self._character_counts[start:end], lookup_counts).sum(axis=1) for start, end in ranges] + [numpy.zeros(0, dtype=numpy.int64)])
+            total = self._lengths[rows] + lookup_length
+            upper_bounds = numpy.divide(2.0 * common, total, out=numpy.ones(len(total)), where=total > 0)
+
+            rows = numpy.concatenate([deferred_rows, rows])
+            upper_bounds = numpy.concatenate([deferred_bounds, upper_bounds])
+
+            # candidates are ranked in the order of their upper bound, until there're enough results
+            # and no remaining candidate can reach the similarity of the last result
+            selection = numpy.nonzero(upper_bounds > 0.5)[0]
+            selection = selection[numpy.lexsort((self._order[rows[selection]], -upper_bounds[selection]))]
+
+            deferred = selection[upper_bounds[selection] <= min_length_bound]
+            deferred_rows, deferred_bounds = rows[deferred], upper_bounds[deferred]
+
+            selection = selection[upper_bounds[selection] > min_length_bound]
+
+            # create result set and order by similarity
+            # only the first results are returned
+            for row, upper_bound in zip(rows[selection].tolist(), upper_bounds[selection].tolist()):
+                if len(similarities) >= limit and upper_bound < similarities[limit - 1]:
+                    break
+
+                i = int(self._order[row])
+
+                matcher.set_seq1(self._names[i])
+                similarity = matcher.ratio()
+
+                if similarity > 0.5:
+                    s = self._stations[i]
+
+                    obj = dict()
+                    obj['parent_id'] = s[0]
+                    obj['name'] = s[1]
+                    obj['latitude'] = s[2]
+                    obj['longitude'] = s[3]
+                    obj['similarity'] = similarity
+
+                    result.append((i, obj))
+
+                    bisect.insort(similarities, similarity, key=lambda v: -v)
+
+            # neither the deferred candidates nor the stations outside of the band can exceed its minimum length bound
+            if len(similarities) >= limit and similarities[limit - 1] > min_length_bound:
+                break
+
+        # results are in the order of the stations for the same similarity
+        result = [obj for _, obj in sorted(result, key=lambda r: r[0])]
+
+        return sorted(result, key=lambda s: s['similarity'], reverse=True)[:limit]
+
+    def memory_bytes(self) -> int:
+        memory_bytes = sys.getsizeof(self._names) + sum([sys.getsizeof(n) for n in self._names])
+        memory_bytes = memory_bytes + sys.getsizeof(self._characters) + self._lengths.nbytes + self._order.nbytes + self._character_counts.nbytes
+
+        return memory_bytes
@@ -0,0 +1,85 @@
+import bisect
+import pytz
+
+from datetime import datetime
+from datetime import timezone
+
+
+class TimeBase:
+
+    def __init__(self, operation_day: int, timezone_name: str) -> None:
+        self._tz = pytz.timezone(timezone_name)
+
+        # wall clock times are handled as seconds since the UTC midnight of the operation day,
+        # this way they can be converted without creating a datetime object for every value
+        self._naive_midnight: int = int(datetime.strptime(str(operation_day), '%Y%m%d').replace(tzinfo=timezone.utc).timestamp())
+
+        # offsets are valid from their wall clock boundary until the next boundary, trips of an
+        # operation day may start up to a day after midnight, so transitions are searched in a
+        # window which covers the previous and the following day
+        self._boundaries: list = list()
+        self._offsets: list = [self._utc_offset(self._naive_midnight - 2 * 86400)]
+
+        for transition in self._find_transitions(self._naive_midnight - 2 * 86400, self._naive_midnight + 3 * 86400):
+            # wall clock times which don't exist or exist twice around a transition use the offset before the
+            # transition, times in a gap are moved forward by the gap size and repeated times resolve to their
+            # first occurrence, this is the same as fold=0 of zoneinfo
+            offset = self._utc_offset(transition)
+
+            self._boundaries.append(transition + max(self._offsets[-1], offset))
+            self._offsets.append(offset)
+
+    @property
+    def midnight(self) -> int:
+        return self.to_timestamp(0)
+
+    @property
+    def length(self) -> int:
+        # 23 or 25 hours on days with a DST transition
+        return self.to_timestamp(86400) - self.midnight
+
+    @property
+    def transitions(self) -> list:
+        return [boundary - self._naive_midnight for boundary in self._boundaries]
+
+    def to_timestamp(self, seconds: int) -> int:
+        wall_time = self._naive_midnight + seconds
+        return wall_time - self._offsets[bisect.bisect_right(self._boundaries, wall_time)]
+
+    def to_timestamps(self, seconds):
+        import numpy
+
+        wall_times = self._naive_midnight + numpy.asarray(seconds, dtype=numpy.int64)
+        offsets = numpy.array(self._offsets, dtype=numpy.int64)
+
+        return wall_times - offsets[numpy.searchsorted(numpy.array(self._boundaries, dtype=numpy.int64), wall_times, side='right')]
+
+    def to_seconds(self, timestamp: int) -> int:
+        return timestamp + self._utc_offset(timestamp) - self._naive_midnight
+
+    def to_datetime(self, timestamp: int) -> datetime:
+        return datetime.fromtimestamp(timestamp, self._tz)
+
+    def _utc_offset(self, timestamp: int) -> int:
+        return int(datetime.fromtimestamp(timestamp, self._tz).utcoffset().total_seconds())
+
+    def _find_transitions(self, start: int, end: int) -> list:
+        transitions: list = list()
+
+        # offsets are sampled hourly, each change is narrowed down to the exact second afterwards
+        previous = start
+        for current in range(start + 3600, end + 1, 3600):
+            if self._utc_offset(current) != self._utc_offset(previous):
+                lower, upper = previous, current
+                while upper - lower > 1:
+                    middle = (lower + upper) // 2
+                    if self._utc_offset(middle) == self._utc_offset(lower):
+                        lower = middle
+                    else:
+                        upper = middle
+
+                transitions.append(upper)
+
+            previous = current
+
+        return transitions
@@ -1,25 +1,96 @@
 import csv
+import hashlib
+import json
 import logging
+import os
+import pyarrow
+import pyarrow.compute
+import pyarrow.csv
+import pyarrow.ipc
 import re
 
+from collections.abc import Sequence
+
 ########################################################################################################################
 # Helper class for reading and modifying *.x10 files.
 ########################################################################################################################
 
-def read_x10_file(filename, null_value='NULL', encoding='utf-8'):
+# format version of cached tables, increase whenever the parsed table layout changes
+X10_CACHE_VERSION = 2
+
+# placeholder for fields missing in a record when comparing records by their primary key
+_MISSING_VALUE = object()
+
+def read_x10_file(filename, null_value='NULL', encoding='utf-8', columns=None, filters=None):
     x10_file = X10File()
     x10_file.null_value = null_value
     x10_file.encoding = encoding
-    x10_file.read(filename)
+    x10_file.read(filename, columns, filters)
     
     return x10_file
     
     
+def stream_x10_file(filename, null_value='NULL', encoding='utf-8', columns=None, filters=None):
+    x10_file = X10File()
+    x10_file.null_value = null_value
+    x10_file.encoding = encoding
+
+    return x10_file.stream(filename, columns, filters)
+
+
+def read_x10_table(filename, null_value='NULL', encoding='utf-8', cache_directory=None, columns=None, filters=None):
+    x10_file = X10File()
+    x10_file.null_value = null_value
+    x10_file.encoding = encoding
+
+    if cache_directory is not None:
+        return x10_file.read_cached_table(filename, cache_directory, columns, filters)
+    
+    return x10_file.read_table(filename, columns, filters)
+
+
+def read_x10_header(filename, encoding='utf-8'):
+    x10_file = X10File()
+    x10_file.encoding = encoding
+    x10_file.read_header(filename)
+
+    return x10_file
+
+
 def create_x10_file(filename):
     x10_file = X10File(filename)
     
     return x10_file
 
+
+def x10_type_of(fstr, fsize=None):
+    # arrow type of a column, which is used by all columnar readers of X10 files
+    dtype = _dtype_of_fstr(fstr, fsize)
+    if dtype == int:
+        if fsize is not None and int(fsize.split('.')[0]) < 10:
+            return pyarrow.int32()
+        else:
+            return pyarrow.int64()
+    elif dtype == float:
+        return pyarrow.float64()
+    else:
+        return pyarrow.string()
+
+
+def _dtype_of_fstr(fstr, fsize=None):
+    if fstr == 'char':
+        return str
+    elif fstr == 'boolean':
+        return bool
+    elif fstr == 'num' and fsize is not None:
+        decimal_places = int(fsize.split('.')[1])
+        if decimal_places > 0:
+            return float
+        else:
+            return int
+    else:
+        return int
+
 class X10File:
 
     def __init__(self, filename=None):
@@ -29,88 +100,265 @@ class X10File:
         
         self._internal_init()
 
-    def read(self, filename):
+    def read(self, filename, columns=None, filters=None):
+        for record in self.stream(filename, columns, filters):
+            self.records.append(record)
+
+    def stream(self, filename, columns=None, filters=None):
+        for x10_row in self._read_rows(filename, columns, filters):
+            yield self._create_record(x10_row)
+
+    def read_header(self, filename):
         self._filename = filename
+
+        with open(self._filename, newline='', encoding=self.encoding) as x10_file:
+            x10_reader = csv.reader(x10_file, delimiter=';', quotechar='"')
+            for x10_row in x10_reader:
+                if len(x10_row) > 0:
+                    if x10_row[0] in ['rec', 'end', 'eof']:
+                        break
+
+                    self._read_header_row(x10_row)
+
+    def read_table(self, filename, columns=None, filters=None, batch_size=65536):
+        num_header_rows = self._read_header_rows(filename)
+
+        for cname in (filters or dict()).keys():
+            if cname not in self.attributes:
+                raise ValueError(f"Filter column {cname} not found in {self._filename}")
+
+        # records are parsed by the native CSV reader of arrow, only selected and filtered columns are
+        # read as strings and converted afterwards, the end and eof rows don't match the number of columns 
+        # and are handled by the invalid row handler as well as malformed records
+        invalid_rows = {'end': None, 'malformed': 0}
+
+        def handle_invalid_row(row):
+            kind = row.text.split(';', 1)[0].strip()
+            if kind == 'end':
+                invalid_rows['end'] = int(row.text.split(';')[1].strip())
+            elif kind != 'eof':
+                invalid_rows['malformed'] = invalid_rows['malformed'] + 1
+
+            return 'skip'
+
+        column_names = ['_rec'] + self.attributes
+        include_columns = ['_rec'] + [a for a in self.attributes if columns is None or a in columns or a in (filters or dict())]
+
+        try:
+            csv_table = pyarrow.csv.read_csv(
+                filename,
+                read_options=pyarrow.csv.ReadOptions(column_names=column_names, skip_rows=num_header_rows, encoding=self.encoding, block_size=1 << 24),
+                parse_options=pyarrow.csv.ParseOptions(delimiter=';', quote_char='"', invalid_row_handler=handle_invalid_row),
+                convert_options=pyarrow.csv.ConvertOptions(column_types={c: pyarrow.string() for c in include_columns}, include_columns=include_columns, strings_can_be_null=False, quoted_strings_can_be_null=False)
+            )
+        except pyarrow.ArrowInvalid:
+            csv_table = None
+
+        # malformed records are padded or truncated by the row parser, so these files are read row by row,
+        # the same applies to files without any record or with rows which are no records within the data section
+        if csv_table is None or invalid_rows['malformed'] > 0:
+            return self._read_table_rows(filename, columns, filters, batch_size)
+
+        num_records = pyarrow.compute.sum(pyarrow.compute.equal(pyarrow.compute.utf8_trim_whitespace(csv_table.column('_rec')), 'rec')).as_py()
+        if csv_table.num_rows == 0 or not num_records == csv_table.num_rows:
+            return self._read_table_rows(filename, columns, filters, batch_size)
+
+        if invalid_rows['end'] is None:
+            self._handle_error(f"no end record found in {self._filename}, file may be truncated")
+        elif not invalid_rows['end'] == csv_table.num_rows:
+            self._handle_error(f"number of records not matching, expected {invalid_rows['end']} but found {csv_table.num_rows}")
+
+        # filtered columns are converted first, so that other columns are converted for the remaining rows only
+        if filters is not None:
+            arrow_types = {a: x10_type_of(d['type'], d['size']) for a, d in zip(self.attributes, self.datatypes)}
+
+            mask = None
+            for cname, values in filters.items():
+                if not isinstance(values, (list, tuple, set, frozenset)):
+                    values = [values]
+
+                array = self._create_arrow_array(csv_table.column(cname), arrow_types[cname])
+                column_mask = pyarrow.compute.is_in(array, value_set=pyarrow.array(list(values), type=arrow_types[cname]))
+                mask = column_mask if mask is None else pyarrow.compute.and_(mask, column_mask)
+
+            csv_table = csv_table.filter(mask)
+
+        self._apply_projection(columns, filters)
+
+        x10_schema = self._create_arrow_schema()
+
+        arrays = list()
+        for field in x10_schema:
+            arrays.append(self._create_arrow_array(csv_table.column(field.name), field.type).combine_chunks())
+
+        return X10Table(pyarrow.Table.from_arrays(arrays, schema=x10_schema), self.null_value)
+
+    def _read_table_rows(self, filename, columns=None, filters=None, batch_size=65536):
+        self._internal_init()
+
+        x10_batches = list()
+        x10_schema = None
+
+        x10_rows = list()
+        for x10_row in self._read_rows(filename, columns, filters):
+            x10_rows.append(x10_row)
+
+            if len(x10_rows) >= batch_size:
+                x10_schema = self._create_arrow_schema()
+                x10_batches.append(self._create_arrow_batch(x10_rows, x10_schema))
+                x10_rows = list()
+
+        x10_schema = self._create_arrow_schema()
+        if len(x10_rows) > 0 or len(x10_batches) == 0:
+            x10_batches.append(self._create_arrow_batch(x10_rows, x10_schema))
+
+        return X10Table(pyarrow.Table.from_batches(x10_batches, x10_schema), self.null_value)
+
+    def _read_header_rows(self, filename):
+        self._filename = filename
+
+        # returns the number of lines before the first record
+        with open(self._filename, newline='', encoding=self.encoding) as x10_file:
+            x10_reader = csv.reader(x10_file, delimiter=';', quotechar='"')
+            for x10_row in x10_reader:
+                if len(x10_row) > 0:
+                    if x10_row[0] in ['rec', 'end', 'eof']:
+                        return x10_reader.line_num - 1
+
+                    self._read_header_row(x10_row)
+
+        return x10_reader.line_num
+
+    def read_cached_table(self, filename, cache_directory, columns=None, filters=None):
+        cache_prefix = f"{os.path.basename(filename)}."
+        cache_filename = os.path.join(cache_directory, f"{cache_prefix}{self._create_fingerprint(filename)}.arrow")
+
+        # load the cached table memory mapped if the fingerprint of the file is known already
+        if os.path.isfile(cache_filename):
+            try:
+                with pyarrow.memory_map(cache_filename, 'r') as cache_file:
+                    x10_table = X10Table(pyarrow.ipc.open_file(cache_file).read_all(), self.null_value)
+
+                logging.info(f"Using cached table {cache_filename}")
+                
+                return self._select_table(x10_table, columns, filters)
+            except (OSError, pyarrow.ArrowInvalid) as ex:
+                logging.warning(f"Failed to load cached table {cache_filename}: {str(ex)}")
+        
+        # parse the file and store the parsed table for later runs, the cache file is written
+        # to a temporary file first in order not to leave defective cache files behind
+        x10_table = self.read_table(filename)
+
+        os.makedirs(cache_directory, exist_ok=True)
+        with pyarrow.OSFile(f"{cache_filename}.tmp", 'wb') as cache_file:
+            with pyarrow.ipc.new_file(cache_file, x10_table.table.schema) as cache_writer:
+                cache_writer.write_table(x10_table.table)
+
+        os.replace(f"{cache_filename}.tmp", cache_filename)
+
+        # remove cached tables of previous versions of this file
+        for entry in os.listdir(cache_directory):
+            if entry.startswith(cache_prefix) and not entry == os.path.basename(cache_filename):
+                os.remove(os.path.join(cache_directory, entry))
+
+        return self._select_table(x10_table, columns, filters)
+
+    def _select_table(self, x10_table, columns=None, filters=None):
+        table = x10_table.table
+
+        # cached tables always contain all columns and rows of a file, so columns and 
+        # filters are applied vectorized to the loaded table
+        if filters is not None:
+            mask = None
+            for cname, values in filters.items():
+                if not isinstance(values, (list, tuple, set, frozenset)):
+                    values = [values]
+
+                column_mask = pyarrow.compute.is_in(table.column(cname), value_set=pyarrow.array(list(values), type=table.schema.field(cname).type))
+                mask = column_mask if mask is None else pyarrow.compute.and_(mask, column_mask)
+
+            table = table.filter(mask)
+
+        if columns is not None:
+            table = table.select([cname for cname in table.schema.names if cname in columns])
+
+        return X10Table(table, self.null_value)
+
+    def _read_rows(self, filename, columns=None, filters=None):
+        self._filename = filename
+
+        num_records = 0
+        num_records_expected = None
+
+        row_filters = None
     
         with open(self._filename, newline='', encoding=self.encoding) as x10_file:
             x10_reader = csv.reader(x10_file, delimiter=';', quotechar='"')
             for x10_row in x10_reader:
                 if len(x10_row) > 0:
                 
-                    if x10_row[0] == 'mod':
-                        self.date_format = x10_row[1].strip().strip('"')
-                        self.time_format = x10_row[2].strip().strip('"')
-                        self.representation = x10_row[3].strip().strip('"')
-                    
-                    elif x10_row[0] == 'src':
-                        self.creator_name = x10_row[1].strip().strip('"')
-                        self.creation_date = x10_row[2].strip().strip('"')
-                        self.creation_time = x10_row[3].strip().strip('"')
-                        
-                    elif x10_row[0] == 'chs':
-                        self.charset = x10_row[1].strip().strip('"')
-                        
-                    elif x10_row[0] == 'ver':
-                        self.file_version = x10_row[1].strip().strip('"')
-                    
-                    elif x10_row[0] == 'ifv':
-                        self.interface_version = x10_row[1].strip().strip('"')
-                        
-                    elif x10_row[0] == 'dve':
-                        self.data_version = x10_row[1].strip().strip('"')
-                        
-                    elif x10_row[0] == 'fft':
-                        self.file_format = x10_row[1].strip().strip('"')
-                        
-                    elif x10_row[0] == 'tbl':
-                        self.table_name = x10_row[1].strip().strip('"')
-                        
-                    elif x10_row[0] == 'atr':
-                        self.attributes = list()
-                        for val in x10_row[1:]:
-                            self.attributes.append(val.strip().strip('"'))
-                            
-                    elif x10_row[0] == 'frm':
-                        self.datatypes = list()
-                        for val in x10_row[1:]:
-                            dtype_value = re.split(r"[\[\]]", val.strip().strip('"'))
-                            
-                            if len(dtype_value) > 1:
-                                dtype = dtype_value[0]
-                                dsize = dtype_value[1]
-                                
-                                self.datatypes.append({'type': dtype, 'size': dsize})
-                            else:
-                                self.datatypes.append({'type': dtype_value[0], 'size': None})
-                            
-                    elif x10_row[0] == 'rec':
-                        record = dict()
-                        for i, val in enumerate(x10_row[1:]):
-                            val = val.strip().strip('"')
-                            
-                            if val == '""':
-                                val = ''
-                                
-                            dtype = self._dtype_of_fstr(self.datatypes[i]['type'], self.datatypes[i]['size'])
-                            if dtype == str:
-                                record[self.attributes[i]] = str(val)
-                            elif dtype == int and val != self.null_value:
-                                record[self.attributes[i]] = int(val)
-                            elif dtype == float and val != self.null_value:
-                                record[self.attributes[i]] = float(val)
-                            else: # boolean is also handled as string here, since it can contain 0/1 or False/True
-                                record[self.attributes[i]] = val
-                               
-                        self.records.append(record)
+                    if x10_row[0] == 'rec':
+                        if row_filters is None:
+                            row_filters = self._apply_projection(columns, filters)
+
+                        num_records = num_records + 1
+
+                        if not len(x10_row) == self._num_row_values:
+                            self._handle_error(f"number of values not matching, expected {self._num_row_values - 1} but found {len(x10_row) - 1}")
+                            x10_row = (x10_row + [self.null_value] * self._num_row_values)[:self._num_row_values]
+
+                        # rows are filtered before creating records, only the filtered columns are converted here
+                        if all(converter(x10_row[position]) in values for position, converter, values in row_filters):
+                            yield x10_row
                         
                     elif x10_row[0] == 'end':
-                        if not len(self.records) == int(x10_row[1]):
-                            logging.error("number of records not matching")
+                        if row_filters is None:
+                            row_filters = self._apply_projection(columns, filters)
+
+                        num_records_expected = int(x10_row[1])
+                        if not num_records == num_records_expected:
+                            self._handle_error(f"number of records not matching, expected {num_records_expected} but found {num_records}")
                             
                     elif x10_row[0] == 'eof':
                         pass
+
+                    else:
+                        self._read_header_row(x10_row)
+
+        if row_filters is None:
+            self._apply_projection(columns, filters)
+
+        if num_records_expected is None:
+            self._handle_error(f"no end record found in {self._filename}, file may be truncated")
+
+    def _apply_projection(self, columns, filters):
+        self._num_row_values = len(self.attributes) + 1
+
+        row_filters = list()
+        if filters is not None:
+            for cname, values in filters.items():
+                if cname not in self.attributes:
+                    raise ValueError(f"Filter column {cname} not found in {self._filename}")
+                
+                if not isinstance(values, (list, tuple, set, frozenset)):
+                    values = [values]
+
+                column_index = self.attributes.index(cname)
+                row_filters.append((column_index + 1, self._converters[column_index], set(values)))
+
+        # only selected columns remain in the header, columns not present in the file are ignored
+        self._projection = [i + 1 for i, attr in enumerate(self.attributes) if columns is None or attr in columns]
+
+        self.attributes = [self.attributes[p - 1] for p in self._projection]
+        self.datatypes = [self.datatypes[p - 1] for p in self._projection]
+        self._converters = [self._converters[p - 1] for p in self._projection]
+
+        return row_filters
                         
     def write(self, filename=None):
+        self.write_records(self.records, filename)
+
+    def write_records(self, records, filename=None):
         if filename == None:
             filename = self._filename
     
@@ -163,27 +411,22 @@ class X10File:
                 
             x10_writer.writerow(f_dtypes)
             
-            # write records
-            f_records = list()
-            for record in self.records:
-                
+            # write records in a single pass, column order and formatters are resolved once
+            column_formatters = list()
+            for attr, datatype in zip(self.attributes, self.datatypes):
+                column_formatters.append((attr, self._create_formatter(datatype['type'], datatype['size'])))
+
+            num_records = 0
+            for record in records:
                 f_record = ['rec']
-                for rkey in record:
-                    
-                    column_index = self.attributes.index(rkey)
-                    
-                    fstr = self.datatypes[column_index]['type']
-                    fsize = self.datatypes[column_index]['size']
-                    dtype = self._dtype_of_fstr(fstr, fsize)
-                    
-                    f_record.insert(column_index + 1, self._create_value(record[rkey], dtype))
-                    
-                f_records.append(f_record)
-                
-            x10_writer.writerows(f_records)
+                for attr, formatter in column_formatters:
+                    f_record.append(formatter(record.get(attr, self.null_value)))
+
+                x10_writer.writerow(f_record)
+                num_records = num_records + 1
             
             # write table end
-            x10_writer.writerow(['end', self._create_value(len(self.records), int)])
+            x10_writer.writerow(['end', self._create_value(num_records, int)])
             
             # write file end
             x10_writer.writerow(['eof', self._create_value(1, int)])
@@ -198,6 +441,8 @@ class X10File:
         
         for record in self.records:
             record[cname] = default
+
+        self._drop_record_indexes()
             
     def remove_column(self, cname):
         column_index = self.attributes.index(cname)
@@ -207,50 +452,62 @@ class X10File:
         
         for record in self.records:
             del record[cname]
+
+        self._drop_record_indexes()
             
     def add_record(self, rdata, primary_key=None):
-        record_existing = False
-        record_pkfields = self._create_compare_record(rdata, primary_key)
-        for i in range(len(self.records)):
-            compare_record = self._create_compare_record(self.records[i], primary_key)
-            
-            if record_pkfields == compare_record:
-                record_existing = True
-                break
+        record_index = self._record_index(primary_key)
                 
-        if not record_existing:
-            self.records.append(rdata)
+        if self._create_index_key(rdata, primary_key) not in record_index:
+            if id(rdata) in self._removed_record_ids:
+                self._compact_records()
+
+            self._records.append(rdata)
+
+            for index_name, index in self._record_indexes.items():
+                index.setdefault(self._create_index_key(rdata, index_name), list()).append(rdata)
+
+            self._indexed_records_count = len(self._records)
             
     def remove_records(self, rdata, primary_key=None):
-        updated_records = list()
-        for i in range(len(self.records)):
-            compare_record = self._create_compare_record(self.records[i], primary_key)
-            
-            if rdata != compare_record:
-                updated_records.append(self.records[i])
-                
-        self.records = updated_records 
-
-    def find_records(self, rdata, primary_key=None):
-        rdata = self._create_compare_record(rdata, primary_key)
         
-        result_records = list()
-        for i in range(len(self.records)):
-            compare_record = self._create_compare_record(self.records[i], primary_key)
+        # records are only removed if rdata contains primary key fields only
+        # see find_records for comparison of records with their primary key fields
+        if primary_key is not None and any(k not in primary_key for k in rdata):
+            return
+        
+        record_index = self._record_index(primary_key)
+        
+        removed_records = record_index.pop(self._create_index_key(rdata, primary_key), None)
+        if removed_records is None:
+            return
+        
+        removed_record_ids = {id(r) for r in removed_records}
+
+        # keep all other indexes up to date
+        for index_name, index in self._record_indexes.items():
+            for removed_record in removed_records:
+                index_key = self._create_index_key(removed_record, index_name)
+                if index_key in index:
+                    index[index_key] = [r for r in index[index_key] if id(r) not in removed_record_ids]
+                    if len(index[index_key]) == 0:
+                        del index[index_key]
 
-            if rdata == compare_record:
-                result_records.append(self.records[i])
+        # removed records are dropped from the records list the next time it is accessed, 
+        # so that removing many records one after another does not copy the list each time
+        self._removed_record_ids.update(removed_record_ids)
+
+    def find_records(self, rdata, primary_key=None):
+        record_index = self._record_index(primary_key)
 
-        return result_records
+        return list(record_index.get(self._create_index_key(rdata, primary_key), list()))
     
     def find_record(self, rdata, primary_key=None):
-        rdata = self._create_compare_record(rdata, primary_key)
-        
-        for i in range(len(self.records)):
-            compare_record = self._create_compare_record(self.records[i], primary_key)
+        record_index = self._record_index(primary_key)
 
-            if rdata == compare_record:
-                return self.records[i]
+        result_records = record_index.get(self._create_index_key(rdata, primary_key))
+        if result_records is not None:
+            return result_records[0]
             
     def replace_foreign_keys(self, foreign_key_columns, repl_map):
         for i in range(len(self.records)):
@@ -265,7 +522,21 @@ class X10File:
                     
             if updated:
                 self.records[i] = updated_record
+
+        self._drop_record_indexes()
             
+    @property
+    def records(self):
+        if len(self._removed_record_ids) > 0:
+            self._compact_records()
+
+        return self._records
+    
+    @records.setter
+    def records(self, records):
+        self._records = records
+        self._removed_record_ids = set()
+
     def close(self):
         self._internal_init()
         
@@ -288,8 +559,207 @@ class X10File:
         self.attributes = list()
         self.datatypes = list()
         self.records = list()
+
+        self._converters = list()
+        self._projection = list()
+        self._num_row_values = 0
+
+        self._drop_record_indexes()
+
+    def _drop_record_indexes(self):
+        self._record_indexes = dict()
+        self._indexed_records = None
+        self._indexed_records_count = 0
+        
+    def _compact_records(self):
+        self._records = [r for r in self._records if id(r) not in self._removed_record_ids]
+        self._removed_record_ids = set()
+
+        self._indexed_records = self._records
+        self._indexed_records_count = len(self._records)
+
+    def _record_index(self, primary_key):
+        index_name = tuple(primary_key) if primary_key is not None else None
+
+        # indexes are built lazily for each primary key used and kept up to date by add_record and remove_records,
+        # if records were changed from outside, e.g. by appending to self.records directly, all indexes are rebuilt
+        if self._indexed_records is not self._records or not self._indexed_records_count == len(self._records):
+            self._drop_record_indexes()
+
+            self._indexed_records = self._records
+            self._indexed_records_count = len(self._records)
+
+        if index_name not in self._record_indexes:
+            record_index = dict()
+            for record in self.records:
+                record_index.setdefault(self._create_index_key(record, index_name), list()).append(record)
+
+            self._record_indexes[index_name] = record_index
+
+        return self._record_indexes[index_name]
                           
             
+    def _create_fingerprint(self, filename):
+        stat = os.stat(filename)
+
+        # fingerprint contains the file size, modification time and content hash
+        # as well as the parameters which have an effect on the parsed table
+        fingerprint = hashlib.sha256()
+        fingerprint.update(f"{X10_CACHE_VERSION};{stat.st_size};{stat.st_mtime_ns};{self.encoding};{self.null_value};".encode('utf-8'))
+
+        with open(filename, 'rb') as x10_file:
+            for chunk in iter(lambda: x10_file.read(1024 * 1024), b''):
+                fingerprint.update(chunk)
+
+        return fingerprint.hexdigest()
+
+    def _read_header_row(self, x10_row):
+    
+        if x10_row[0] == 'mod':
+            self.date_format = x10_row[1].strip().strip('"')
+            self.time_format = x10_row[2].strip().strip('"')
+            self.representation = x10_row[3].strip().strip('"')
+        
+        elif x10_row[0] == 'src':
+            self.creator_name = x10_row[1].strip().strip('"')
+            self.creation_date = x10_row[2].strip().strip('"')
+            self.creation_time = x10_row[3].strip().strip('"')
+            
+        elif x10_row[0] == 'chs':
+            self.charset = x10_row[1].strip().strip('"')
+            
+        elif x10_row[0] == 'ver':
+            self.file_version = x10_row[1].strip().strip('"')
+        
+        elif x10_row[0] == 'ifv':
+            self.interface_version = x10_row[1].strip().strip('"')
+            
+        elif x10_row[0] == 'dve':
+            self.data_version = x10_row[1].strip().strip('"')
+            
+        elif x10_row[0] == 'fft':
+            self.file_format = x10_row[1].strip().strip('"')
+            
+        elif x10_row[0] == 'tbl':
+            self.table_name = x10_row[1].strip().strip('"')
+            
+        elif x10_row[0] == 'atr':
+            self.attributes = list()
+            for val in x10_row[1:]:
+                self.attributes.append(val.strip().strip('"'))
+                
+        elif x10_row[0] == 'frm':
+            self.datatypes = list()
+            for val in x10_row[1:]:
+                dtype_value = re.split(r"[\[\]]", val.strip().strip('"'))
+                
+                if len(dtype_value) > 1:
+                    dtype = dtype_value[0]
+                    dsize = dtype_value[1]
+                    
+                    self.datatypes.append({'type': dtype, 'size': dsize})
+                else:
+                    self.datatypes.append({'type': dtype_value[0], 'size': None})
+
+            self._create_converters()
+
+    def _create_record(self, x10_row):
+        record = dict()
+        for attribute, converter, position in zip(self.attributes, self._converters, self._projection):
+            record[attribute] = converter(x10_row[position])
+
+        return record
+
+    def _create_converters(self):
+        self._converters = list()
+        for datatype in self.datatypes:
+            self._converters.append(self._create_converter(datatype['type'], datatype['size']))
+
+    def _create_converter(self, fstr, fsize=None):
+        null_value = self.null_value
+
+        dtype = _dtype_of_fstr(fstr, fsize)
+        if dtype == int:
+            def convert(val):
+                val = val.strip().strip('"')
+                return int(val) if val != null_value else val
+            
+        elif dtype == float:
+            def convert(val):
+                val = val.strip().strip('"')
+                return float(val) if val != null_value else val
+            
+        else: # boolean is also handled as string here, since it can contain 0/1 or False/True
+            def convert(val):
+                return val.strip().strip('"')
+            
+        return convert
+    
+    def _create_arrow_schema(self):
+        fields = list()
+        for attribute, datatype in zip(self.attributes, self.datatypes):
+            fields.append(pyarrow.field(attribute, x10_type_of(datatype['type'], datatype['size'])))
+
+        return pyarrow.schema(fields, metadata=self._create_arrow_metadata())
+
+    def _create_arrow_batch(self, x10_rows, x10_schema):
+        # transpose rows into columns and convert the selected columns only
+        x10_columns = list(zip(*x10_rows)) if len(x10_rows) > 0 else [tuple() for _ in range(self._num_row_values)]
+
+        arrays = list()
+        for position, field in zip(self._projection, x10_schema):
+            arrays.append(self._create_arrow_array(x10_columns[position], field.type))
+
+        return pyarrow.RecordBatch.from_arrays(arrays, schema=x10_schema)
+    
+    def _create_arrow_array(self, values, atype):
+        # columns parsed by arrow are converted as they are, rows are transposed into python tuples
+        if isinstance(values, (pyarrow.Array, pyarrow.ChunkedArray)):
+            array = values
+        else:
+            array = pyarrow.array(values, type=pyarrow.string())
+
+        array = pyarrow.compute.utf8_trim(pyarrow.compute.utf8_trim_whitespace(array), '"')
+
+        # char and boolean columns are kept as they are, numeric values matching
+        # the NULL value are masked before casting them to their final type
+        if atype == pyarrow.string():
+            return array
+        
+        null_mask = pyarrow.compute.equal(array, self.null_value)
+        array = pyarrow.compute.if_else(null_mask, pyarrow.scalar(None, pyarrow.string()), array)
+
+        return array.cast(atype)
+    
+    def _create_arrow_metadata(self):
+        return {
+            b'x10': json.dumps({
+                'date_format': self.date_format,
+                'time_format': self.time_format,
+                'representation': self.representation,
+                'creator_name': self.creator_name,
+                'creation_date': self.creation_date,
+                'creation_time': self.creation_time,
+                'charset': self.charset,
+                'file_version': self.file_version,
+                'interface_version': self.interface_version,
+                'data_version': self.data_version,
+                'file_format': self.file_format,
+                'table_name': self.table_name,
+                'attributes': self.attributes,
+                'datatypes': self.datatypes
+            }).encode('utf-8')
+        }
+
+    def _handle_error(self, message):
+
+        # in strict mode, structural errors of the file abort reading
+        # otherwise they're only logged and reading continues
+        if self.strict:
+            raise ValueError(message)
+        else:
+            logging.error(message)
+            
     def _create_value(self, val, dtype=str):
         
         if dtype == str:
@@ -297,20 +767,16 @@ class X10File:
         else:
             return f" {val}"
             
-    def _dtype_of_fstr(self, fstr, fsize=None):
-        
-        if fstr == 'char':
-            return str
-        elif fstr == 'boolean':
-            return bool
-        elif fstr == 'num' and fsize is not None:
-            decimal_places = int(fsize.split('.')[1])
-            if decimal_places > 0:
-                return float
-            else:
-                return int
+    def _create_formatter(self, fstr, fsize=None):
+
+        if _dtype_of_fstr(fstr, fsize) == str:
+            def format_value(val):
+                return f" \"{val}\""
         else:
-            return int
+            def format_value(val):
+                return f" {val}"
+            
+        return format_value
             
     def _fstr_of_dtype(self, dtype):
         
@@ -321,15 +787,124 @@ class X10File:
         else:
             return 'num'
         
-    def _create_compare_record(self, record, primary_key):
-    
+    def _create_index_key(self, record, primary_key):
+
+        # two records are considered equal if they match in all primary key fields, a field missing
+        # in both records is considered equal too; without primary key, the whole records are compared
         if primary_key is not None:
-            compare_record = dict(record)
-            if primary_key is not None:
-                for k in record:
-                    if k not in primary_key:
-                        del compare_record[k]
-                        
-            return compare_record
+            return tuple(record.get(k, _MISSING_VALUE) for k in primary_key)
         else:
-            return record
+            return frozenset(record.items())
+
+
+class X10Table:
+
+    def __init__(self, table, null_value='NULL'):
+        self.table = table
+        self.null_value = null_value
+
+        header = json.loads(table.schema.metadata[b'x10'].decode('utf-8'))
+
+        self.date_format = header['date_format']
+        self.time_format = header['time_format']
+        self.representation = header['representation']
+        self.creator_name = header['creator_name']
+        self.creation_date = header['creation_date']
+        self.creation_time = header['creation_time']
+        self.charset = header['charset']
+        self.file_version = header['file_version']
+        self.interface_version = header['interface_version']
+        self.data_version = header['data_version']
+        self.file_format = header['file_format']
+        self.table_name = header['table_name']
+        self.attributes = list(table.schema.names)
+
+        # the table may contain a subset of the columns described in the header only
+        datatypes = dict(zip(header['attributes'], header['datatypes']))
+        self.datatypes = [datatypes[attr] for attr in self.attributes]
+
+    @property
+    def records(self):
+        return X10RecordView(self)
+    
+    def column(self, cname):
+        return self.table.column(cname)
+    
+    def iter_records(self, batch_size=65536):
+        for batch in self.table.to_batches(max_chunksize=batch_size):
+            nullable_columns = [n for n, c in zip(batch.schema.names, batch.columns) if c.null_count > 0]
+            for record in batch.to_pylist():
+                yield self._restore_null_values(record, nullable_columns)
+
+    def write(self, filename, encoding='utf-8'):
+        x10_file = self._create_x10_file_header()
+        x10_file.encoding = encoding
+        
+        x10_file.write_records(self.iter_records(), filename)
+
+    def to_x10_file(self):
+        x10_file = self._create_x10_file_header()
+        x10_file.records = list(self.iter_records())
+
+        return x10_file
+    
+    def __len__(self):
+        return self.table.num_rows
+    
+    def _create_x10_file_header(self):
+        x10_file = X10File()
+        x10_file.null_value = self.null_value
+
+        x10_file.date_format = self.date_format
+        x10_file.time_format = self.time_format
+        x10_file.representation = self.representation
+        x10_file.creator_name = self.creator_name
+        x10_file.creation_date = self.creation_date
+        x10_file.creation_time = self.creation_time
+        x10_file.charset = self.charset
+        x10_file.file_version = self.file_version
+        x10_file.interface_version = self.interface_version
+        x10_file.data_version = self.data_version
+        x10_file.file_format = self.file_format
+        x10_file.table_name = self.table_name
+        x10_file.attributes = list(self.attributes)
+        x10_file.datatypes = [dict(d) for d in self.datatypes]
+
+        return x10_file
+    
+    def _restore_null_values(self, record, nullable_columns):
+        
+        # masked numeric values are represented by the NULL value in records
+        # this matches the behaviour of X10File.records
+        for cname in nullable_columns:
+            if record[cname] is None:
+                record[cname] = self.null_value
+
+        return record
+    
+
+class X10RecordView(Sequence):
+
+    def __init__(self, x10_table):
+        self._x10_table = x10_table
+
+    def __len__(self):
+        return len(self._x10_table)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        
+        if index < 0:
+            index = index + len(self)
+
+        if index < 0 or index >= len(self):
+            raise IndexError('record index out of range')
+        
+        row = self._x10_table.table.slice(index, 1)
+        nullable_columns = [n for n, c in zip(row.schema.names, row.columns) if c.null_count > 0]
+
+        return self._x10_table._restore_null_values(row.to_pylist()[0], nullable_columns)
+    
+    def __iter__(self):
+        return self._x10_table.iter_records()
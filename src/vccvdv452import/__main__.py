@@ -7,6 +7,8 @@ from croniter import croniter
 from datetime import datetime
 
 from vcclib import database
+from vcclib import metrics
+from vcclib.common import is_set
 from vccvdv452import.adapter.base import BaseAdapter
 from vccvdv452import.adapter.default import DefaultAdapter
 from vccvdv452import.adapter.vvs import VvsAdapter
@@ -19,7 +21,7 @@ def run():
     if croniter.match(cron, now):
         _run_now()
 
-def _run_now():
+def _run_now(force: bool = False):
     adapter: BaseAdapter = None
 
     adapter_type = os.getenv('VCC_VDV452_ADAPTER_TYPE', 'default')
@@ -30,20 +32,27 @@ def _run_now():
     else:
         raise ValueError(f"Unknown adapter type {adapter_type}!")
     
+    # each run reports its stages into a metrics summary, which is written at the end of the run
+    metrics.start('vdv452import')
+
     try:
-        adapter.process('/data')
+        adapter.process('/data', force or is_set('VCC_VDV452_IMPORT_FORCE'))
     except Exception as ex:
+        metrics.status('failed')
         if os.getenv('VCC_DEBUG', '0') == '1':
             logging.exception(ex)
         else:
             logging.error(str(ex))
+    finally:
+        metrics.finish()
 
 @click.group()
 def cli():
     pass
 
 @cli.command()
-def main():
+@click.option('--force', is_flag=True, default=False, help='Run the import at startup even if the input data is unchanged')
+def main(force):
 
     # set logging default configuration
     logging.basicConfig(format="[%(levelname)s] %(asctime)s %(message)s", level=logging.INFO)
@@ -52,7 +61,7 @@ def main():
     database.init()
 
     # run import first time at startup
-    _run_now()
+    _run_now(force)
 
     while True:
         run()
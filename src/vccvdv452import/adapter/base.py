@@ -5,5 +5,5 @@ from abc import abstractmethod
 class BaseAdapter(ABC):
 
     @abstractmethod
-    def process(self, input_directory: str) -> None:
+    def process(self, input_directory: str, force: bool = False) -> None:
         pass
\ No newline at end of file
@@ -1,27 +1,46 @@
+import contextlib
+import json
 import logging
+import numpy
 import os
-import pytz
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from datetime import timedelta
+from typing import Iterator
 from typing import Tuple
 
 from vcclib import database
+from vcclib import metrics
+from vcclib.database import BulkInsert
+from vcclib.common import is_set
+from vcclib.timebase import TimeBase
+from vcclib.model import ImportGeneration
 from vcclib.model import Stop
 from vcclib.model import Line
+from vcclib.model import StopPattern
+from vcclib.model import PatternStop
 from vcclib.model import Trip
 from vcclib.model import StopTime
 from vcclib.filesystem import directory_contains_files
 from vcclib.filesystem import file_exists
-from vcclib.x10 import read_x10_file, X10File
+from vcclib.x10 import read_x10_table, stream_x10_file
 from vccvdv452import.adapter.base import BaseAdapter
+from vccvdv452import.manifest import create_fingerprint
+from vccvdv452import.manifest import create_manifest
+from vccvdv452import.stoptimes import StopTimeEngine
+from vccvdv452import.stoptimes import init_stop_time_worker
+from vccvdv452import.stoptimes import write_stop_times
+from vccvdv452import.validation import ReferenceValidator
 
 
 class DefaultAdapter(BaseAdapter):
 
     def __init__(self) -> None:
-        pass
+        self._tables: dict = dict()
 
-    def process(self, input_directory: str) -> None:
+    def process(self, input_directory: str, force: bool = False) -> None:
 
         # verify input directory and files present
         if not self._verify(input_directory):
@@ -29,14 +48,9 @@ class DefaultAdapter(BaseAdapter):
         
         # define processing variables
         batch_size = 2500
-
-        # clear database before insert
-        logging.info('Clearing database ...')
-        
-        Stop.deleteMany(where=None)
-        Line.deleteMany(where=None)
-        Trip.deleteMany(where=None)
-        StopTime.deleteMany(where=None)
+        num_workers = int(os.getenv('VCC_VDV452_IMPORT_WORKERS', '1'))
+        horizon_days = int(os.getenv('VCC_VDV452_IMPORT_HORIZON_DAYS', '1'))
+        storage = os.getenv('VCC_VDV452_IMPORT_STORAGE', 'stoptimes')
 
         try:
 
@@ -44,315 +58,512 @@ class DefaultAdapter(BaseAdapter):
             timezone = os.getenv('VCC_TIMEZONE', 'Europe/Berlin')
             logging.info(f"Running in timezone {timezone}")
 
-            # load network data ...
-            logging.info('Loading network data ...')
+            # stop times are either stored for every trip or as stop patterns shared by all trips with the same offsets
+            if storage not in ['stoptimes', 'patterns']:
+                raise ValueError(f"Unknown storage mode {storage}")
+            
+            logging.info(f"Storing timetable as {storage}")
 
-            # load and import stop objects
-            stop_index: dict = self._extract_stop_data(input_directory, batch_size)
+            # load calendar data and resolve daytypes of all operation days within the horizon
+            logging.info('Loading calendar data ...')
 
-            # load and import line objects
-            line_data: Tuple[dict, dict] = self._extract_line_data(input_directory, batch_size)
-            line_index, line_direction_index = line_data
+            operation_day = int(datetime.now().strftime('%Y%m%d'))
 
-            # load trip link objects
-            logging.info('Loading additional data ...')
-            trip_link_index: dict = self._extract_trip_links(input_directory, batch_size)
+            with metrics.stage('resolve_daytypes'):
+                calendar_index: dict = self._load_calendar_index(input_directory)
 
-            # load timetable information data ...  
-            logging.info('Loading timetable information data ...')
+                if operation_day not in calendar_index:
+                    raise ValueError(f"No valid daytype number found for {operation_day}")
+                
+                operation_days: dict = dict()
+                for d in range(0, horizon_days + 1):
+                    horizon_day = int((datetime.now() + timedelta(days=d)).strftime('%Y%m%d'))
+                    if horizon_day in calendar_index:
+                        operation_days[horizon_day] = calendar_index[horizon_day]
 
-            daytype = None
-            x10_firmenkalender = self._internal_read_x10_file(input_directory, 'firmenkalender.x10')
-            for record in x10_firmenkalender.records:
-                if datetime.now().strftime('%Y%m%d') == str(record['BETRIEBSTAG']):
-                    daytype = record['TAGESART_NR']
-                    break
+                        logging.info(f"Using daytype number {calendar_index[horizon_day]} for operation day {horizon_day}")
+                    else:
+                        logging.warning(f"No valid daytype number found for {horizon_day}, skipping operation day")
 
-            x10_firmenkalender.close()
+            # the import is skipped if the input files and the generated operation days are the same as 
+            # for the current generation, so restarting the container doesn't rebuild the timetable
+            with metrics.stage('create_manifest'):
+                manifest: dict = create_manifest(input_directory, operation_days, {
+                    'adapter': type(self).__name__,
+                    'timezone': timezone,
+                    'storage': storage
+                })
 
-            if daytype == None:
-                raise ValueError(f"No valid daytype number found for {datetime.now().strftime('%Y%m%d')}")
-            
-            logging.info(f"Using daytype number {daytype}")
+            fingerprint: str = create_fingerprint(manifest)
+            latest_generation: ImportGeneration = ImportGeneration.latest()
 
-            # load routes for each line
-            line_route_index = dict()
-            x10_lid_verlauf = self._internal_read_x10_file(input_directory, 'lid_verlauf.x10')
-            for record in x10_lid_verlauf.records:
-                if record['ONR_TYP_NR'] == 1:
-                    line_id = record['LI_NR']
-                    line_variant_id = record['STR_LI_VAR']
-                    stop_nr = record['ORT_NR']
+            if not force and latest_generation is not None and latest_generation.fingerprint == fingerprint:
+                logging.info(f"Input data unchanged since generation {latest_generation.generation}, skipping import")
+                metrics.status('skipped')
+                return
 
-                    if (line_id, line_variant_id) not in line_route_index:
-                        line_route_index[(line_id, line_variant_id)] = list()
+            # data is imported into shadow tables which are switched in after the import has finished, 
+            # so the previous timetable remains available during the import and after a failed import
+            logging.info('Creating shadow tables ...')
 
-                    line_route_index[(line_id, line_variant_id)].append(stop_nr)
+            with metrics.stage('create_shadow_tables'):
+                self._tables = database.create_shadow_tables([Stop, Line, StopPattern, PatternStop, Trip, StopTime])
 
-            x10_lid_verlauf.close()
+            daytypes: list = sorted(set(operation_days.values()))
 
-            # load time demand types
-            time_demand_type_index = dict()
-            x10_sel_fzt_feld = self._internal_read_x10_file(input_directory, 'sel_fzt_feld.x10')
-            for record in x10_sel_fzt_feld.records:
-                if record['ONR_TYP_NR'] == 1 and record['SEL_ZIEL_TYP'] == 1:
-                    tdt_id = record['FGR_NR']
-                    start_stop_id = record['ORT_NR']
-                    dest_stop_id = record['SEL_ZIEL']
-                    time_demand_seconds = record['SEL_FZT']
+            # load network and timetable data ...
+            # each file is parsed independently, so this runs concurrently if there're multiple workers configured
+            logging.info(f"Loading network and timetable data using {num_workers} worker(s) ...")
 
-                    if tdt_id not in time_demand_type_index:
-                        time_demand_type_index[tdt_id] = dict()
+            with metrics.stage('load_indexes'):
+                indexes: dict = self._load_indexes(input_directory, batch_size, daytypes, num_workers)
 
-                    if start_stop_id not in time_demand_type_index[tdt_id]:
-                        time_demand_type_index[tdt_id][start_stop_id] = dict()
+            line_data, _ = indexes['line_data']
 
-                    if dest_stop_id not in time_demand_type_index[tdt_id][start_stop_id]:
-                        time_demand_type_index[tdt_id][start_stop_id][dest_stop_id] = dict()
+            # validate all routes against the run time, dwell time and stop indexes once, gaps are reported
+            # in a single report and trip generation skips invalid routes without checking every stop again
+            logging.info('Validating references ...')
+            with metrics.stage('validate_references'):
+                validation_report: dict = self._validate_references(indexes)
 
-                    time_demand_type_index[tdt_id][start_stop_id][dest_stop_id] = time_demand_seconds
+            metrics.count('reference_gaps', len(validation_report['gaps']))
 
-            x10_sel_fzt_feld.close()
+            # import stop objects
+            logging.info('Importing network data ...')
+            with metrics.stage('extract_stop_data'):
+                stop_index: dict = self._extract_stop_data(indexes['stop_data'], batch_size)
 
-            # load stop based waiting time index
-            stop_waiting_time_index = dict()
+            # import line objects
+            with metrics.stage('extract_line_data'):
+                line_index: dict = self._extract_line_data(line_data, batch_size)
 
-            x10_ort_hztf = self._internal_read_x10_file(input_directory, 'ort_hztf.x10')
-            for record in x10_ort_hztf.records:
-                if record['ONR_TYP_NR'] == 1:
-                    tdt_id = record['FGR_NR']
-                    stop_id = record['ORT_NR']
-                    waiting_time_seconds = record['HP_HZT']
+            # generate trips
+            logging.info(f"Generating trips for {len(operation_days)} operation day(s) using {num_workers} worker(s) ...")
 
-                    if tdt_id not in stop_waiting_time_index:
-                        stop_waiting_time_index[tdt_id] = dict()
-                        
-                    stop_waiting_time_index[tdt_id][stop_id] = waiting_time_seconds
+            with metrics.stage('extract_trip_data'):
+                trip_index: dict = self._extract_trip_data(indexes, validation_report, stop_index, line_index, operation_days, timezone, storage, batch_size, num_workers)
 
-            x10_ort_hztf.close()
+            logging.info(f"Found {len(trip_index)} trips for {len(operation_days)} operation day(s)")
 
-            # load trip based waiting time index
-            trip_waiting_time_index = dict()
+            if len(trip_index) == 0:
+                raise ValueError(f"No trips generated for operation day {operation_day}, keeping previous timetable")
 
-            x10_rec_frt_hzt = self._internal_read_x10_file(input_directory, 'rec_frt_hzt.x10')
-            for record in x10_rec_frt_hzt.records:
-                if record['ONR_TYP_NR'] == 1:
-                    trip_id = record['FRT_FID']
-                    stop_id = record['ORT_NR']
-                    waiting_time_seconds = record['FRT_HZT_ZEIT']
+            # indexes are created after all data has been written, which is faster than updating them on every batch
+            logging.info('Creating indexes ...')
+            with metrics.stage('index_shadow_tables'):
+                database.index_shadow_tables(self._tables)
 
-                    if trip_id not in trip_waiting_time_index:
-                        trip_waiting_time_index[trip_id] = dict()
+            # stops with at least one starting trip are marked once, so the API doesn't need to search the stop times
+            with metrics.stage('mark_starting_stops'):
+                num_starting_stops: int = database.mark_starting_stops(self._tables)
 
-                    trip_waiting_time_index[trip_id][stop_id] = waiting_time_seconds
+            # switch shadow tables and tag the import with a new generation number
+            generation = (ImportGeneration.current() or 0) + 1
 
-            x10_rec_frt_hzt.close()
+            with metrics.stage('swap_shadow_tables'):
+                database.swap_shadow_tables(self._tables, {
+                    'generation': generation,
+                    'operation_day': operation_day,
+                    'created_timestamp': int(datetime.now().timestamp()),
+                    'fingerprint': fingerprint,
+                    'manifest': json.dumps(manifest)
+                })
 
-            # load and generate trips
-            operation_day = int(datetime.now().strftime('%Y%m%d'))
-            logging.info(f"Generating trips for operation day {operation_day} ...")
+            # shadow tables are live now and must not be dropped anymore
+            self._tables = dict()
+
+            logging.info(f"Import done, switched to generation {generation}")
+
+            metrics.count('operation_days', len(operation_days))
+            metrics.count('stops', len(stop_index))
+            metrics.count('lines', len(line_index))
+            metrics.count('trips', len(trip_index))
+            metrics.count('starting_stops', num_starting_stops)
+        
+        except Exception as ex:
+            logging.exception(ex)
+            metrics.status('failed')
+
+            database.drop_shadow_tables(self._tables)
+
+        finally:
+            self._tables = dict()
 
-            trip_index = dict()
+    def _load_indexes(self, input_directory: str, batch_size: int, daytypes: list, num_workers: int) -> dict:
+        
+        # loaders are ordered by the expected size of their files, so that the largest 
+        # files are scheduled first when running in a process pool
+        loaders: dict = {
+            'trip_data': (self._load_trip_data, input_directory, daytypes),
+            'time_demand_type_index': (self._load_time_demand_type_index, input_directory),
+            'line_route_index': (self._load_line_route_index, input_directory),
+            'trip_waiting_time_index': (self._load_trip_waiting_time_index, input_directory),
+            'stop_waiting_time_index': (self._load_stop_waiting_time_index, input_directory),
+            'stop_data': (self._load_stop_data, input_directory),
+            'line_data': (self._load_line_data, input_directory),
+            'trip_link_index': (self._extract_trip_links, input_directory, batch_size)
+        }
 
-            transaction = database.connection().transaction()
-            transaction_count = 0
+        if num_workers <= 1:
+            return {name: loader[0](*loader[1:]) for name, loader in loaders.items()}
 
-            x10_rec_frt = self._internal_read_x10_file(input_directory, 'rec_frt.x10')
-            for i, record in enumerate(x10_rec_frt.records):
-                try:
-                    if record['TAGESART_NR'] == daytype:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures: dict = {name: executor.submit(*loader) for name, loader in loaders.items()}
 
-                        trip_id = record['FRT_FID']
-                        line_id = record['LI_NR']
-                        international_id = None
+            return {name: future.result() for name, future in futures.items()}
 
-                        # generate start time of the trip
-                        # note, that the start timestamp of 'today' is already UTC, but the record['FRT_START'] is in local time of the system which has
-                        # exported the data. So we need to convert the whole thing to UTC before proceeding ... see #5 for more information
-                        _start_time_local = int(datetime.now().replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=pytz.utc).timestamp()) + record['FRT_START']
-                        _start_time_utc = int(pytz.timezone(timezone).localize(datetime.fromtimestamp(_start_time_local)).timestamp())
+    def _load_calendar_index(self, input_directory: str) -> dict:
+        calendar_index = dict()
 
-                        # create working variables
-                        _line_variant_id = record['STR_LI_VAR']
-                        _tdt_id = record['FGR_NR']
-                        _last_timestamp = _start_time_utc
-                        _intermediate_stops = line_route_index[(line_id, _line_variant_id)]
+        columns: list = ['BETRIEBSTAG', 'TAGESART_NR']
 
-                        direction = line_direction_index[(line_id, _line_variant_id)]
+        for record in self._internal_stream_x10_file(input_directory, 'firmenkalender.x10', columns):
+            operation_day = int(record['BETRIEBSTAG'])
+            daytype = record['TAGESART_NR']
 
-                        trip = Trip(
-                            trip_id=trip_id, 
-                            line=line_index[line_id],
-                            direction=direction,
-                            international_id=international_id,
-                            operation_day=operation_day,
-                            next_trip_id=trip_link_index[trip_id] if trip_id in trip_link_index else None,
-                            connection=transaction
-                        )
+            calendar_index[operation_day] = daytype
 
-                        for s in range(0, len(_intermediate_stops)):
-                            try:
-                                stop_id = _intermediate_stops[s]
-                                arrival_timestamp = _last_timestamp
-                                departure_timestamp = arrival_timestamp
+        return calendar_index
+    
+    def _load_stop_data(self, input_directory: str) -> dict:
+        stop_data = dict()
+
+        columns: list = ['ORT_NR', 'ORT_REF_ORT', 'ORT_REF_ORT_NAME', 'ORT_POS_BREITE', 'ORT_POS_LAENGE', 'HST_NR_INTERNATIONAL', 'ORT_GLOBAL_ID']
+        filters: dict = {'ONR_TYP_NR': 1}
+
+        for record in self._internal_stream_x10_file(input_directory, 'rec_ort.x10', columns, filters):
+            stop_id = record['ORT_NR']
+
+            if 'HST_NR_INTERNATIONAL' in record:
+                international_id = record['HST_NR_INTERNATIONAL']
+            elif 'ORT_GLOBAL_ID' in record:
+                international_id = record['ORT_GLOBAL_ID']
+            else:
+                international_id = None
+
+            stop_data[stop_id] = {
+                'name': record['ORT_REF_ORT_NAME'],
+                'latitude': self._convert_coordinate(record['ORT_POS_BREITE']),
+                'longitude': self._convert_coordinate(record['ORT_POS_LAENGE']),
+                'international_id': international_id,
+                'parent_id': record['ORT_REF_ORT']
+            }
+
+        return stop_data
+
+    def _load_line_data(self, input_directory: str) -> Tuple[dict, dict]:
+        line_data: dict = dict()
+        line_direction_index: dict = dict()
 
-                                if _tdt_id in stop_waiting_time_index and stop_id in stop_waiting_time_index[_tdt_id]:
-                                    departure_timestamp = departure_timestamp + stop_waiting_time_index[_tdt_id][stop_id]
+        columns: list = ['LI_NR', 'STR_LI_VAR', 'LI_RI_NR', 'LIDNAME', 'LinienID']
 
-                                if trip_id in trip_waiting_time_index and stop_id in trip_waiting_time_index[trip_id]:
-                                    departure_timestamp = departure_timestamp + trip_waiting_time_index[trip_id][stop_id]
+        for record in self._internal_stream_x10_file(input_directory, 'rec_lid.x10', columns):
+            line_id = record['LI_NR']
+            line_variant_id = record['STR_LI_VAR']
+            direction = record['LI_RI_NR']
+            name = record['LIDNAME']
+            
+            if 'LinienID' in record:
+                international_id = record['LinienID']
+            else:
+                international_id = None
 
-                                if s == len(_intermediate_stops) - 1:
-                                    departure_timestamp = None
+            if (line_id, line_variant_id) not in line_direction_index:
+                line_direction_index[(line_id, line_variant_id)] = direction
 
-                                StopTime(
-                                    stop=stop_index[stop_id],
-                                    trip=trip,
-                                    arrival_timestamp=arrival_timestamp,
-                                    departure_timestamp=departure_timestamp,
-                                    sequence=s + 1,
-                                    connection=transaction
-                                )
+            if line_id not in line_data:
+                line_data[line_id] = {
+                    'name': name,
+                    'international_id': international_id
+                }
 
-                                if s < len(_intermediate_stops) - 1:
-                                    next_stop_id = _intermediate_stops[s + 1]
+        return line_data, line_direction_index
 
-                                    _last_timestamp = departure_timestamp + time_demand_type_index[_tdt_id][stop_id][next_stop_id]
-                            except KeyError as ex:
-                                logging.error(f"Stop {next_stop_id} not found in time demand type index {_tdt_id}. Stop sequence of this trip may be incomplete.")
-                                logging.exception(ex)
+    def _load_line_route_index(self, input_directory: str) -> dict:
+        line_route_index = dict()
 
-                        trip.headsign = stop_index[_intermediate_stops[-1]].name
+        columns: list = ['LI_NR', 'STR_LI_VAR', 'ORT_NR']
+        filters: dict = {'ONR_TYP_NR': 1}
 
-                        trip_index[trip.trip_id] = trip
-                        transaction_count = transaction_count + 1
+        for record in self._internal_stream_x10_file(input_directory, 'lid_verlauf.x10', columns, filters):
+            line_id = record['LI_NR']
+            line_variant_id = record['STR_LI_VAR']
+            stop_nr = record['ORT_NR']
 
-                    if transaction_count >= batch_size or i >= len(x10_rec_frt.records) - 1:
-                        transaction.commit()
+            if (line_id, line_variant_id) not in line_route_index:
+                line_route_index[(line_id, line_variant_id)] = list()
 
-                        logging.info(f"Imported batch of {transaction_count} trips")
+            line_route_index[(line_id, line_variant_id)].append(stop_nr)
 
-                        transaction = database.connection().transaction()
-                        transaction_count = 0
+        return line_route_index
+    
+    def _load_time_demand_type_index(self, input_directory: str) -> dict:
+        time_demand_type_index = dict()
 
-                except Exception as ex:
-                    transaction.rollback()
-                    transaction_count = 0
+        columns: list = ['FGR_NR', 'ORT_NR', 'SEL_ZIEL', 'SEL_FZT']
+        filters: dict = {'ONR_TYP_NR': 1, 'SEL_ZIEL_TYP': 1}
 
-                    if not i >= len(x10_rec_frt.records) - 1:
-                        transaction = database.connection().transaction()
+        for record in self._internal_stream_x10_file(input_directory, 'sel_fzt_feld.x10', columns, filters):
+            tdt_id = record['FGR_NR']
+            start_stop_id = record['ORT_NR']
+            dest_stop_id = record['SEL_ZIEL']
+            time_demand_seconds = record['SEL_FZT']
 
-                    logging.exception(ex)
+            if tdt_id not in time_demand_type_index:
+                time_demand_type_index[tdt_id] = dict()
 
-            logging.info(f"Found {len(trip_index)} unique trips for operation day {datetime.now().strftime('%Y%m%d')}")
-            logging.info("Import done")
-        
-        except Exception as ex:
-            logging.exception(ex)
+            if start_stop_id not in time_demand_type_index[tdt_id]:
+                time_demand_type_index[tdt_id][start_stop_id] = dict()
 
-    def _extract_stop_data(self, input_directory: str, batch_size: int) -> dict:
-        stop_index = dict()
+            time_demand_type_index[tdt_id][start_stop_id][dest_stop_id] = time_demand_seconds
 
-        transaction = database.connection().transaction()
-        transaction_count = 0
-
-        x10_rec_ort = self._internal_read_x10_file(input_directory, 'rec_ort.x10')
-        for i, record in enumerate(x10_rec_ort.records):
-            try:
-                if record['ONR_TYP_NR'] == 1:
-                    stop_id = record['ORT_NR']
-                    name = record['ORT_REF_ORT_NAME']
-                    latitude = self._convert_coordinate(record['ORT_POS_BREITE'])
-                    longitude = self._convert_coordinate(record['ORT_POS_LAENGE'])
-                    parent_id = record['ORT_REF_ORT']
-
-                    if 'HST_NR_INTERNATIONAL' in record:
-                        international_id = record['HST_NR_INTERNATIONAL']
-                    elif 'ORT_GLOBAL_ID' in record:
-                        international_id = record['ORT_GLOBAL_ID']
-                    else:
-                        international_id = None
-
-                    stop_index[stop_id] = Stop(
-                        stop_id=stop_id,
-                        name=name,
-                        latitude=latitude,
-                        longitude=longitude,
-                        international_id=international_id,
-                        parent_id=parent_id,
-                        connection=transaction
-                    )
+        return time_demand_type_index
+    
+    def _load_stop_waiting_time_index(self, input_directory: str) -> dict:
+        stop_waiting_time_index = dict()
 
-                if transaction_count >= batch_size or i >= len(x10_rec_ort.records) - 1:
-                    transaction.commit()
+        columns: list = ['FGR_NR', 'ORT_NR', 'HP_HZT']
+        filters: dict = {'ONR_TYP_NR': 1}
 
-                    transaction = database.connection().transaction()
-                    transaction_count = 0
+        for record in self._internal_stream_x10_file(input_directory, 'ort_hztf.x10', columns, filters):
+            tdt_id = record['FGR_NR']
+            stop_id = record['ORT_NR']
+            waiting_time_seconds = record['HP_HZT']
 
-            except Exception as ex:
-                transaction.rollback()
-                transaction_count = 0
+            if tdt_id not in stop_waiting_time_index:
+                stop_waiting_time_index[tdt_id] = dict()
+                
+            stop_waiting_time_index[tdt_id][stop_id] = waiting_time_seconds
+
+        return stop_waiting_time_index
+    
+    def _load_trip_waiting_time_index(self, input_directory: str) -> dict:
+        trip_waiting_time_index = dict()
 
-                if not i >= len(x10_rec_ort.records):
-                    transaction = database.connection().transaction()
+        columns: list = ['FRT_FID', 'ORT_NR', 'FRT_HZT_ZEIT']
+        filters: dict = {'ONR_TYP_NR': 1}
 
-                logging.exception(ex)
+        for record in self._internal_stream_x10_file(input_directory, 'rec_frt_hzt.x10', columns, filters):
+            trip_id = record['FRT_FID']
+            stop_id = record['ORT_NR']
+            waiting_time_seconds = record['FRT_HZT_ZEIT']
 
-        x10_rec_ort.close()
+            if trip_id not in trip_waiting_time_index:
+                trip_waiting_time_index[trip_id] = dict()
+
+            trip_waiting_time_index[trip_id][stop_id] = waiting_time_seconds
+
+        return trip_waiting_time_index
+    
+    def _load_trip_data(self, input_directory: str, daytypes: list) -> list:
+        trip_data = list()
+
+        columns: list = ['FRT_FID', 'FRT_START', 'LI_NR', 'TAGESART_NR', 'STR_LI_VAR', 'FGR_NR']
+        filters: dict = {'TAGESART_NR': daytypes}
+
+        for record in self._internal_stream_x10_file(input_directory, 'rec_frt.x10', columns, filters):
+            trip_data.append({
+                'FRT_FID': record['FRT_FID'],
+                'FRT_START': record['FRT_START'],
+                'TAGESART_NR': record['TAGESART_NR'],
+                'LI_NR': record['LI_NR'],
+                'STR_LI_VAR': record['STR_LI_VAR'],
+                'FGR_NR': record['FGR_NR']
+            })
+
+        return trip_data
+
+    def _extract_stop_data(self, stop_data: dict, batch_size: int) -> dict:
+        stop_index = dict()
+
+        stops: BulkInsert = BulkInsert(Stop, batch_size, table=self._tables.get(Stop))
+
+        for stop_id, stop in stop_data.items():
+            stop_index[stop_id] = stops.insert(
+                stop_id=stop_id,
+                name=stop['name'],
+                latitude=stop['latitude'],
+                longitude=stop['longitude'],
+                international_id=stop['international_id'],
+                parent_id=stop['parent_id']
+            )
+
+        # write remaining stops of the last batch
+        stops.flush()
 
         return stop_index
 
-    def _extract_line_data(self, input_directory: str, batch_size: int) -> Tuple[dict, dict]:
+    def _extract_line_data(self, line_data: dict, batch_size: int) -> dict:
         line_index: dict = dict()
-        line_direction_index: dict = dict()
 
-        transaction = database.connection().transaction()
-        transation_count = 0
+        lines: BulkInsert = BulkInsert(Line, batch_size, table=self._tables.get(Line))
 
-        x10_rec_lid = self._internal_read_x10_file(input_directory, 'rec_lid.x10')
-        for i, record in enumerate(x10_rec_lid.records):
-            try:
-                line_id = record['LI_NR']
-                line_variant_id = record['STR_LI_VAR']
-                direction = record['LI_RI_NR']
-                name = record['LIDNAME']
-                
-                if 'LinienID' in record:
-                    international_id = record['LinienID']
-                else:
-                    international_id = None
-
-                if (line_id, line_variant_id) not in line_direction_index:
-                    line_direction_index[(line_id, line_variant_id)] = direction
-
-                if line_id not in line_index:
-                    line_index[line_id] = Line(
-                        line_id=line_id, 
-                        name=name,
-                        international_id=international_id, 
-                        connection=transaction
+        for line_id, line in line_data.items():
+            line_index[line_id] = lines.insert(
+                line_id=line_id, 
+                name=line['name'],
+                international_id=line['international_id']
+            )
+    
+        # write remaining lines of the last batch
+        lines.flush()
+
+        return line_index
+
+    def _validate_references(self, indexes: dict) -> dict:
+        validator: ReferenceValidator = ReferenceValidator(indexes)
+        return validator.validate(indexes['trip_data'])
+
+    def _extract_trip_data(self, indexes: dict, validation_report: dict, stop_index: dict, line_index: dict, operation_days: dict, timezone: str, storage: str, batch_size: int, num_workers: int = 1) -> dict:
+        trip_index = dict()
+        stop_pattern_index = dict()
+
+        # trip patterns contain all trip data relative to the start time of a trip, they're created once per 
+        # daytype and stamped onto every operation day using this daytype, stop times are computed for all 
+        # trips of a line variant and time demand type at once
+        engine: StopTimeEngine = StopTimeEngine(indexes, validation_report['invalid_routes'])
+        trip_patterns, stop_time_groups = engine.create_trip_patterns(indexes['trip_data'])
+
+        # trips and stop times are written in multi-row batches without creating SQLObject instances,
+        # trips are always flushed before stop times since the stop times reference them
+        stop_patterns: BulkInsert = BulkInsert(StopPattern, batch_size, table=self._tables.get(StopPattern))
+        pattern_stops: BulkInsert = BulkInsert(PatternStop, batch_size * 10, dependencies=[stop_patterns], table=self._tables.get(PatternStop), columns=['patternID', 'stopID', 'arrival_offset', 'departure_offset', 'sequence'])
+        trips: BulkInsert = BulkInsert(Trip, batch_size, dependencies=[stop_patterns], table=self._tables.get(Trip))
+        stop_times: BulkInsert = BulkInsert(StopTime, batch_size * 10, dependencies=[trips], table=self._tables.get(StopTime), columns=['tripID', 'stopID', 'arrival_timestamp', 'departure_timestamp', 'sequence'])
+
+        # with multiple workers, stop times are stamped and written by worker processes in shards of consecutive trips
+        # through connections of their own, trips are still inserted here and each shard gets a range of stop time IDs
+        # reserved in the order of a serial run, so that all IDs are the same as in a serial run
+        parallel: bool = storage == 'stoptimes' and num_workers > 1
+
+        shard: list = list()
+        shard_num_stop_times: int = 0
+        num_worker_stop_times: int = 0
+        pending: deque = deque()
+
+        executor = contextlib.nullcontext()
+        if parallel:
+            worker_stop_time_groups: dict = dict()
+            for group_key, stop_time_group in stop_time_groups.items():
+                worker_stop_time_groups[group_key] = {
+                    'stop_ids': [stop_index[stop_id] for stop_id in stop_time_group['stop_ids']],
+                    'sequences': stop_time_group['sequences'],
+                    'arrival_offsets': stop_time_group['arrival_offsets'],
+                    'departure_offsets': stop_time_group['departure_offsets']
+                }
+
+            executor = ProcessPoolExecutor(max_workers=num_workers, initializer=init_stop_time_worker, initargs=(worker_stop_time_groups, self._tables.get(StopTime, StopTime.sqlmeta.table), batch_size * 10))
+
+        with executor:
+            for operation_day, daytype in operation_days.items():
+                # generate start times of the trips
+                # note, that the FRT_START is in local time of the system which has exported the data. So we need to convert
+                # the whole thing to UTC before proceeding ... see #5 for more information. The time base of an operation day
+                # knows its local midnight and DST transitions, so all start times of a group are converted at once
+                time_base: TimeBase = TimeBase(operation_day, timezone)
+
+                start_times: dict = dict()
+                for trip_pattern, group_key, _ in trip_patterns.get(daytype, list()):
+                    start_times.setdefault(group_key, list()).append(trip_pattern['start_time'])
+
+                start_timestamps: dict = dict()
+                for group_key, group_start_times in start_times.items():
+                    start_timestamps[group_key] = time_base.to_timestamps(group_start_times).tolist()
+
+                # stop times are only stamped onto the operation day if they're stored for every trip,
+                # worker processes are stamping the stop times of their shards themselves
+                stop_time_stamps: dict = dict()
+                if storage == 'stoptimes' and not parallel:
+                    for group_key, group_start_timestamps in start_timestamps.items():
+                        stop_time_stamps[group_key] = engine.stamp_stop_times(stop_time_groups[group_key], numpy.array(group_start_timestamps, dtype=numpy.int64))
+
+                for trip_pattern, group_key, row in trip_patterns.get(daytype, list()):
+                    stop_time_group: dict = stop_time_groups[group_key]
+
+                    # stop patterns are stored once for all trips of a line variant and time demand type sharing the
+                    # same offsets, trips with specific waiting times are using a pattern of their own
+                    stop_pattern = None
+                    if storage == 'patterns':
+                        arrival_offsets, departure_offsets = engine.create_stop_pattern(stop_time_group, row)
+                        stop_pattern_key = (group_key[1:], arrival_offsets, departure_offsets)
+
+                        if stop_pattern_key not in stop_pattern_index:
+                            stop_pattern = stop_patterns.insert(
+                                line_id=group_key[1],
+                                line_variant=str(group_key[2]),
+                                time_demand_type=group_key[3]
+                            )
+
+                            for stop_id, sequence, arrival_offset, departure_offset in zip(stop_time_group['stop_ids'], stop_time_group['sequences'], arrival_offsets, departure_offsets):
+                                pattern_stops.insert_values(stop_pattern, stop_index[stop_id], arrival_offset, departure_offset, sequence)
+
+                            stop_pattern_index[stop_pattern_key] = stop_pattern
+
+                        stop_pattern = stop_pattern_index[stop_pattern_key]
+
+                    trip = trips.insert(
+                        trip_id=trip_pattern['trip_id'], 
+                        lineID=line_index[trip_pattern['line_id']],
+                        direction=trip_pattern['direction'],
+                        headsign=trip_pattern['headsign'],
+                        international_id=trip_pattern['international_id'],
+                        operation_day=operation_day,
+                        next_trip_id=trip_pattern['next_trip_id'],
+                        patternID=stop_pattern,
+                        start_timestamp=start_timestamps[group_key][row]
                     )
 
-                    transation_count = transation_count + 1
+                    if parallel:
+                        shard.append((trip, group_key, row, start_timestamps[group_key][row]))
+                        shard_num_stop_times = shard_num_stop_times + len(stop_time_group['stop_ids'])
 
-                if transation_count >= batch_size or i >= len(x10_rec_lid.records) - 1:
-                    transaction.commit()
+                        if len(shard) >= batch_size:
+                            num_worker_stop_times = num_worker_stop_times + self._submit_stop_times(executor, pending, trips, stop_times.reserve(shard_num_stop_times), shard, num_workers * 2)
+                            shard, shard_num_stop_times = list(), 0
 
-                    transaction = database.connection().transaction()
-                    transation_count = 0
+                    elif storage == 'stoptimes':
+                        arrival_timestamps, departure_timestamps = stop_time_stamps[group_key]
 
-            except Exception as ex:
-                transaction.rollback()
-                transaction_count = 0
+                        for stop_id, sequence, arrival_timestamp, departure_timestamp in zip(stop_time_group['stop_ids'], stop_time_group['sequences'], arrival_timestamps[row], departure_timestamps[row]):
+                            stop_times.insert_values(trip, stop_index[stop_id], arrival_timestamp, departure_timestamp, sequence)
 
-                if not i >= len(x10_rec_lid.records) - 1:
-                    transaction = database.connection().transaction()
+                    trip_index[(operation_day, trip_pattern['trip_id'])] = trip
 
-                logging.exception(ex)
-    
-        x10_rec_lid.close()
+            # the last shard is submitted and all shards are awaited before the workers are shut down
+            if parallel:
+                num_worker_stop_times = num_worker_stop_times + self._submit_stop_times(executor, pending, trips, stop_times.reserve(shard_num_stop_times), shard, 0)
 
-        return line_index, line_direction_index
+        # write remaining trips and stop times of the last batch
+        pattern_stops.flush()
+        stop_times.flush()
+        trips.flush()
+
+        num_stop_times: int = stop_times.num_rows + num_worker_stop_times
+
+        if storage == 'patterns':
+            logging.info(f"Imported {trips.num_rows} trips with {stop_patterns.num_rows} stop patterns and {pattern_stops.num_rows} pattern stops")
+        else:
+            logging.info(f"Imported {trips.num_rows} trips with {num_stop_times} stop times")
+
+        metrics.count('stop_times', num_stop_times)
+        metrics.count('stop_patterns', stop_patterns.num_rows)
+        metrics.count('pattern_stops', pattern_stops.num_rows)
+
+        return trip_index
+
+    def _submit_stop_times(self, executor: ProcessPoolExecutor, pending: deque, trips: BulkInsert, first_id: int, shard: list, max_pending: int) -> int:
+        # trips are written before the workers are writing stop times referencing them
+        trips.flush()
+
+        pending.append(executor.submit(write_stop_times, first_id, shard))
+
+        # the number of shards in flight is limited, so that shards don't pile up in memory while the workers are busy,
+        # the number of stop times written by all finished shards is returned
+        num_stop_times: int = 0
+        while len(pending) > max_pending:
+            num_stop_times = num_stop_times + pending.popleft().result()
+
+        return num_stop_times
 
     def _extract_trip_links(self, input_directory: str, batch_size: int) -> dict:
         # default spec for VDV452 does not have this feature
@@ -387,7 +598,23 @@ class DefaultAdapter(BaseAdapter):
     
         return True
 
-    def _internal_read_x10_file(self, input_directory: str, x10filename: str) -> X10File:
+    def _internal_stream_x10_file(self, input_directory: str, x10filename: str, columns: list = None, filters: dict = None) -> Iterator[dict]:
+        x10filename = self._internal_resolve_x10_filename(input_directory, x10filename)
+
+        # if caching is enabled, the parsed table is stored in a binary format next to the input files
+        # and loaded memory mapped in later runs as long as the file remains unchanged
+        # columns and filters are applied while parsing, so that only required data is materialized
+        if is_set('VCC_VDV452_IMPORT_CACHE'):
+            logging.info(f"Loading {x10filename} ...")
+
+            cache_directory = os.path.join(input_directory, '.x10cache')
+            return read_x10_table(x10filename, encoding='cp1252', cache_directory=cache_directory, columns=columns, filters=filters).iter_records()
+        
+        logging.info(f"Streaming {x10filename} ...")
+
+        return stream_x10_file(x10filename, encoding='cp1252', columns=columns, filters=filters)
+    
+    def _internal_resolve_x10_filename(self, input_directory: str, x10filename: str) -> str:
         for entry in os.listdir(input_directory):
             if entry.lower() == x10filename.lower():
                 x10filename = entry
@@ -398,9 +625,7 @@ class DefaultAdapter(BaseAdapter):
         if not os.path.exists(x10filename) or not os.path.isfile(x10filename):
             raise FileNotFoundError(f"File {x10filename} not found!")
         
-        logging.info(f"Reading {x10filename} ...")
-
-        return read_x10_file(x10filename, encoding='cp1252')
+        return x10filename
 
     def _convert_coordinate(self, input: int) -> float:
         input = str(input)
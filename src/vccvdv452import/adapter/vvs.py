@@ -1,77 +1,48 @@
-import logging
-
 from typing import Tuple
 
-from vcclib import database
-from vcclib.model import Line
 from vccvdv452import.adapter.default import DefaultAdapter
 
 
 class VvsAdapter(DefaultAdapter):
 
-    def _extract_line_data(self, input_directory: str, batch_size: int) -> Tuple[dict, dict]:
-        line_index: dict = dict()
+    def _load_line_data(self, input_directory: str) -> Tuple[dict, dict]:
+        line_data: dict = dict()
         line_direction_index: dict = dict()
 
-        transaction = database.connection().transaction()
-        transation_count = 0
-
-        x10_rec_lid = self._internal_read_x10_file(input_directory, 'rec_lid.x10')
-        for i, record in enumerate(x10_rec_lid.records):
-            try:
-                line_id = record['LI_NR']
-                line_variant_id = record['STR_LI_VAR']
-                direction = record['LI_RI_NR']
-                name = record['LI_KUERZEL']
-                
-                if 'LinienID' in record:
-                    international_id = record['LinienID']
-                else:
-                    international_id = None
-
-                if (line_id, line_variant_id) not in line_direction_index:
-                    line_direction_index[(line_id, line_variant_id)] = direction
-
-                if line_id not in line_index:
-                    line_index[line_id] = Line(
-                        line_id=line_id, 
-                        name=name,
-                        international_id=international_id, 
-                        connection=transaction
-                    )
-
-                    transation_count = transation_count + 1
+        columns: list = ['LI_NR', 'STR_LI_VAR', 'LI_RI_NR', 'LI_KUERZEL', 'LinienID']
 
-                if transation_count >= batch_size or i >= len(x10_rec_lid.records) - 1:
-                    transaction.commit()
+        for record in self._internal_stream_x10_file(input_directory, 'rec_lid.x10', columns):
+            line_id = record['LI_NR']
+            line_variant_id = record['STR_LI_VAR']
+            direction = record['LI_RI_NR']
+            name = record['LI_KUERZEL']
+            
+            if 'LinienID' in record:
+                international_id = record['LinienID']
+            else:
+                international_id = None
 
-                    transaction = database.connection().transaction()
-                    transation_count = 0
+            if (line_id, line_variant_id) not in line_direction_index:
+                line_direction_index[(line_id, line_variant_id)] = direction
 
-            except Exception as ex:
-                transaction.rollback()
-                transaction_count = 0
+            if line_id not in line_data:
+                line_data[line_id] = {
+                    'name': name,
+                    'international_id': international_id
+                }
 
-                if not i >= len(x10_rec_lid.records) - 1:
-                    transaction = database.connection().transaction()
-
-                logging.exception(ex)
-    
-        x10_rec_lid.close()
-
-        return line_index, line_direction_index
+        return line_data, line_direction_index
 
     def _extract_trip_links(self, input_directory: str, batch_size: int) -> dict:
         trip_link_index: dict = dict()
 
-        x10_rec_frt_durchbindung = self._internal_read_x10_file(input_directory, 'rec_frt_durchbindung.x10')
-        for i, record in enumerate(x10_rec_frt_durchbindung.records):
+        columns: list = ['FRT_FID1', 'FRT_FID2']
+
+        for record in self._internal_stream_x10_file(input_directory, 'rec_frt_durchbindung.x10', columns):
             trip_id = record['FRT_FID1']
             next_trip_id = record['FRT_FID2']
 
             trip_link_index[trip_id] = next_trip_id
-
-        x10_rec_frt_durchbindung.close()
         
         return trip_link_index
 
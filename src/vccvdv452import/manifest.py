@@ -0,0 +1,36 @@
+import hashlib
+import json
+import os
+
+
+def create_manifest(input_directory: str, operation_days: dict, settings: dict) -> dict:
+    files: list = list()
+
+    # all regular files of the input directory are part of the manifest, hidden
+    # entries like the X10 cache directory are written by the import itself
+    with os.scandir(input_directory) as entries:
+        for entry in sorted(entries, key=lambda e: e.name.lower()):
+            if entry.is_file() and not entry.name.startswith('.'):
+                files.append({
+                    'name': entry.name,
+                    'size': entry.stat().st_size,
+                    'sha256': _hash_file(entry.path)
+                })
+
+    return {
+        'files': files,
+        'operation_days': {str(operation_day): daytype for operation_day, daytype in operation_days.items()},
+        'settings': settings
+    }
+
+def create_fingerprint(manifest: dict) -> str:
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _hash_file(filename: str) -> str:
+    digest = hashlib.sha256()
+
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
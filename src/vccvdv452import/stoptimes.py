@@ -0,0 +1,198 @@
+import numpy
+
+from typing import Tuple
+
+from vcclib import database
+from vcclib.database import BulkInsert
+from vcclib.model import StopTime
+
+# state of the stop time workers, it's handed over once when a worker is started
+_worker_stop_time_groups: dict = dict()
+_worker_table: str|None = None
+_worker_batch_size: int = 25000
+
+
+class StopTimeEngine:
+
+    def __init__(self, indexes: dict, invalid_routes: set|None = None) -> None:
+        self._stop_data: dict = indexes['stop_data']
+        self._line_route_index: dict = indexes['line_route_index']
+        self._time_demand_type_index: dict = indexes['time_demand_type_index']
+        self._stop_waiting_time_index: dict = indexes['stop_waiting_time_index']
+        self._trip_waiting_time_index: dict = indexes['trip_waiting_time_index']
+        self._trip_link_index: dict = indexes['trip_link_index']
+
+        _, self._line_direction_index = indexes['line_data']
+
+        # routes which failed the reference validation are skipped, all other routes can be generated without further checks
+        self._invalid_routes: set = invalid_routes if invalid_routes is not None else set()
+
+        self._segments: dict = dict()
+
+    def create_trip_patterns(self, trip_data: list) -> Tuple[dict, dict]:
+        trip_patterns: dict = dict()
+        trip_groups: dict = dict()
+
+        # trips are grouped by their daytype, line variant and time demand type, all trips
+        # of a group share the same run and dwell times except their trip specific waiting times
+        for record in trip_data:
+            group_key = (record['TAGESART_NR'], record['LI_NR'], record['STR_LI_VAR'], record['FGR_NR'])
+            if group_key[1:] in self._invalid_routes:
+                continue
+
+            if group_key not in trip_groups:
+                trip_groups[group_key] = list()
+
+            trip_patterns.setdefault(record['TAGESART_NR'], list()).append((record, group_key, len(trip_groups[group_key])))
+            trip_groups[group_key].append(record)
+
+        stop_time_groups: dict = dict()
+        for group_key, records in trip_groups.items():
+            stop_time_groups[group_key] = self._create_stop_time_group(group_key[1], group_key[2], group_key[3], records)
+
+        for daytype in trip_patterns.keys():
+            trip_patterns[daytype] = [
+                (self._create_trip(record, stop_time_groups[group_key]), group_key, row)
+                for record, group_key, row in trip_patterns[daytype]
+            ]
+
+        return trip_patterns, stop_time_groups
+
+    def stamp_stop_times(self, stop_time_group: dict, start_times: numpy.ndarray) -> Tuple[list, list]:
+        start_times = start_times.reshape(-1, 1)
+
+        arrival_timestamps = (start_times + stop_time_group['arrival_offsets']).tolist()
+        departure_timestamps = (start_times + stop_time_group['departure_offsets']).tolist()
+
+        # the last stop of a trip has no departure
+        for departures in departure_timestamps:
+            departures[-1] = None
+
+        return arrival_timestamps, departure_timestamps
+
+    def create_stop_pattern(self, stop_time_group: dict, row: int) -> Tuple[tuple, tuple]:
+        arrival_offsets = tuple(stop_time_group['arrival_offsets'][row].tolist())
+        departure_offsets = tuple(stop_time_group['departure_offsets'][row].tolist()[:-1]) + (None,)
+
+        return arrival_offsets, departure_offsets
+
+    def _create_trip(self, record: dict, stop_time_group: dict) -> dict:
+        trip_id = record['FRT_FID']
+
+        return {
+            'trip_id': trip_id,
+            'line_id': record['LI_NR'],
+            'direction': stop_time_group['direction'],
+            'headsign': stop_time_group['headsign'],
+            'international_id': None,
+            'start_time': record['FRT_START'],
+            'next_trip_id': self._trip_link_index[trip_id] if trip_id in self._trip_link_index else None
+        }
+
+    def _create_stop_time_group(self, line_id: int, line_variant_id: str, tdt_id: int, records: list) -> dict:
+        stop_ids, run_times, dwell_times, present = self._create_segments(line_id, line_variant_id, tdt_id)
+
+        # trip specific waiting times are added to the dwell times of each trip
+        trip_dwell_times = numpy.tile(dwell_times, (len(records), 1))
+        for t, record in enumerate(records):
+            if record['FRT_FID'] in self._trip_waiting_time_index:
+                trip_waiting_times = self._trip_waiting_time_index[record['FRT_FID']]
+                for s, stop_id in enumerate(stop_ids):
+                    if stop_id in trip_waiting_times:
+                        trip_dwell_times[t, s] = trip_dwell_times[t, s] + trip_waiting_times[stop_id]
+
+        # arrival offsets are the cumulative sum of dwell and run times of all previous segments,
+        # segments without a run time or with stops which weren't imported are not advancing the time
+        increments = numpy.where(run_times >= 0, trip_dwell_times + run_times, 0)
+        increments[:, ~present] = 0
+
+        arrival_offsets = numpy.zeros((len(records), len(stop_ids)), dtype=numpy.int64)
+        arrival_offsets[:, 1:] = numpy.cumsum(increments[:, :-1], axis=1)
+
+        departure_offsets = arrival_offsets + trip_dwell_times
+
+        return {
+            'direction': self._line_direction_index[(line_id, line_variant_id)],
+            'headsign': self._stop_data[stop_ids[-1]]['name'],
+            'stop_ids': [stop_id for stop_id, p in zip(stop_ids, present) if p],
+            'sequences': [s + 1 for s, p in enumerate(present) if p],
+            'arrival_offsets': arrival_offsets[:, present],
+            'departure_offsets': departure_offsets[:, present]
+        }
+
+    def _create_segments(self, line_id: int, line_variant_id: str, tdt_id: int) -> tuple:
+        segment_key = (line_id, line_variant_id, tdt_id)
+
+        # run and dwell times are the same for all trips of a line variant and time demand type
+        if segment_key not in self._segments:
+            stop_ids = self._line_route_index[(line_id, line_variant_id)]
+
+            run_times = numpy.zeros(len(stop_ids), dtype=numpy.int64)
+            dwell_times = numpy.zeros(len(stop_ids), dtype=numpy.int64)
+            present = numpy.array([stop_id in self._stop_data for stop_id in stop_ids], dtype=bool)
+
+            stop_waiting_times = self._stop_waiting_time_index.get(tdt_id, dict())
+            time_demands = self._time_demand_type_index.get(tdt_id, dict())
+
+            for s, stop_id in enumerate(stop_ids):
+                dwell_times[s] = stop_waiting_times.get(stop_id, 0)
+
+                if s < len(stop_ids) - 1:
+                    next_stop_id = stop_ids[s + 1]
+
+                    # missing run times were already reported by the reference validation
+                    if stop_id in time_demands and next_stop_id in time_demands[stop_id]:
+                        run_times[s] = time_demands[stop_id][next_stop_id]
+                    elif present[s]:
+                        run_times[s] = -1
+
+            self._segments[segment_key] = (stop_ids, run_times, dwell_times, present)
+
+        return self._segments[segment_key]
+
+
+def init_stop_time_worker(stop_time_groups: dict, table: str, batch_size: int) -> None:
+    global _worker_stop_time_groups, _worker_table, _worker_batch_size
+
+    # processes are forked on Linux, so the groups are shared copy-on-write and never written by the worker,
+    # stop times are written through a connection of the worker itself
+    _worker_stop_time_groups = stop_time_groups
+    _worker_table = table
+    _worker_batch_size = batch_size
+
+    database.reconnect()
+
+def write_stop_times(first_id: int, trips: list) -> int:
+    # trips of the same group are stamped at once, like a serial run does for a whole operation day
+    groups: dict = dict()
+    for t, (_, group_key, row, start_timestamp) in enumerate(trips):
+        positions, rows, start_timestamps = groups.setdefault(group_key, (list(), list(), list()))
+        positions.append(t)
+        rows.append(row)
+        start_timestamps.append(start_timestamp)
+
+    stamps: list = [None] * len(trips)
+    for group_key, (positions, rows, start_timestamps) in groups.items():
+        stop_time_group: dict = _worker_stop_time_groups[group_key]
+        start_timestamps = numpy.array(start_timestamps, dtype=numpy.int64).reshape(-1, 1)
+
+        arrival_timestamps = (start_timestamps + stop_time_group['arrival_offsets'][rows]).tolist()
+        departure_timestamps = (start_timestamps + stop_time_group['departure_offsets'][rows]).tolist()
+
+        for t, arrivals, departures in zip(positions, arrival_timestamps, departure_timestamps):
+            # the last stop of a trip has no departure
+            departures[-1] = None
+            stamps[t] = (arrivals, departures)
+
+    # rows are written in the same order and with the same IDs as a serial run would insert them
+    stop_times: BulkInsert = BulkInsert(StopTime, _worker_batch_size, table=_worker_table, columns=['tripID', 'stopID', 'arrival_timestamp', 'departure_timestamp', 'sequence'], first_id=first_id)
+
+    for (trip_id, group_key, _, _), (arrival_timestamps, departure_timestamps) in zip(trips, stamps):
+        stop_time_group: dict = _worker_stop_time_groups[group_key]
+
+        for stop_id, sequence, arrival_timestamp, departure_timestamp in zip(stop_time_group['stop_ids'], stop_time_group['sequences'], arrival_timestamps, departure_timestamps):
+            stop_times.insert_values(trip_id, stop_id, arrival_timestamp, departure_timestamp, sequence)
+
+    stop_times.flush()
+
+    return stop_times.num_rows
@@ -0,0 +1,116 @@
+import logging
+
+
+class ReferenceValidator:
+
+    def __init__(self, indexes: dict) -> None:
+        self._stop_data: dict = indexes['stop_data']
+        self._line_route_index: dict = indexes['line_route_index']
+        self._time_demand_type_index: dict = indexes['time_demand_type_index']
+        self._trip_waiting_time_index: dict = indexes['trip_waiting_time_index']
+
+        self._line_data, self._line_direction_index = indexes['line_data']
+
+    def validate(self, trip_data: list) -> dict:
+        routes: dict = dict()
+
+        # each route of a line variant and time demand type is validated once for all of its trips
+        for record in trip_data:
+            route_key = (record['LI_NR'], record['STR_LI_VAR'], record['FGR_NR'])
+            routes.setdefault(route_key, list()).append(record['FRT_FID'])
+
+        gaps: list = list()
+        invalid_routes: set = set()
+        incomplete_routes: set = set()
+
+        for route_key, trip_ids in routes.items():
+            route_gaps = self._validate_route(route_key, trip_ids)
+
+            for issue, details, invalid in route_gaps:
+                gaps.append({
+                    'line_id': route_key[0],
+                    'line_variant_id': route_key[1],
+                    'tdt_id': route_key[2],
+                    'issue': issue,
+                    'details': details,
+                    'num_trips': len(trip_ids)
+                })
+
+                if invalid:
+                    invalid_routes.add(route_key)
+                else:
+                    incomplete_routes.add(route_key)
+
+        report: dict = {
+            'gaps': gaps,
+            'invalid_routes': invalid_routes,
+            'incomplete_routes': incomplete_routes - invalid_routes
+        }
+
+        self._log_report(report, routes)
+
+        return report
+
+    def _validate_route(self, route_key: tuple, trip_ids: list) -> list:
+        line_id, line_variant_id, tdt_id = route_key
+        gaps: list = list()
+
+        # routes without line, direction, stop sequence or destination can't be generated at all
+        if line_id not in self._line_data:
+            gaps.append(('missing_line', None, True))
+
+        if (line_id, line_variant_id) not in self._line_direction_index:
+            gaps.append(('missing_line_variant', None, True))
+
+        if (line_id, line_variant_id) not in self._line_route_index:
+            gaps.append(('missing_route', None, True))
+            return gaps
+
+        stop_ids = self._line_route_index[(line_id, line_variant_id)]
+
+        if stop_ids[-1] not in self._stop_data:
+            gaps.append(('missing_destination', stop_ids[-1], True))
+
+        # missing run times don't advance the time of the following stops, the trips are generated anyway
+        if tdt_id not in self._time_demand_type_index:
+            gaps.append(('missing_time_demand_type', None, False))
+        else:
+            time_demands = self._time_demand_type_index[tdt_id]
+            missing_run_times = [
+                (stop_id, next_stop_id) for stop_id, next_stop_id in zip(stop_ids[:-1], stop_ids[1:])
+                if stop_id in self._stop_data and next_stop_id not in time_demands.get(stop_id, dict())
+            ]
+
+            if len(missing_run_times) > 0:
+                gaps.append(('missing_run_times', missing_run_times, False))
+
+        # trip specific waiting times of stops which aren't part of the route are ignored
+        route_stop_ids = set(stop_ids)
+        unused_waiting_times = [
+            trip_id for trip_id in trip_ids
+            if trip_id in self._trip_waiting_time_index and not self._trip_waiting_time_index[trip_id].keys() <= route_stop_ids
+        ]
+
+        if len(unused_waiting_times) > 0:
+            gaps.append(('unused_trip_waiting_times', unused_waiting_times, False))
+
+        return gaps
+
+    def _log_report(self, report: dict, routes: dict) -> None:
+        if len(report['gaps']) == 0:
+            logging.info(f"Validated {len(routes)} route(s), no gaps found")
+            return
+
+        num_invalid_trips = sum(len(routes[route_key]) for route_key in report['invalid_routes'])
+        num_incomplete_trips = sum(len(routes[route_key]) for route_key in report['incomplete_routes'])
+
+        lines: list = [
+            f"Validated {len(routes)} route(s), found {len(report['gaps'])} gap(s): "
+            f"{len(report['invalid_routes'])} route(s) with {num_invalid_trips} trip(s) are skipped, "
+            f"{len(report['incomplete_routes'])} route(s) with {num_incomplete_trips} trip(s) may be incomplete"
+        ]
+
+        for gap in report['gaps']:
+            lines.append(f"  line {gap['line_id']} variant {gap['line_variant_id']} tdt {gap['tdt_id']} ({gap['num_trips']} trip(s)): {gap['issue']}" + (f" {gap['details']}" if gap['details'] is not None else ''))
+
+        logging.warning('\n'.join(lines))
@@ -9,6 +9,7 @@ import vccvdv457export.adapter.s3.default as s3
 from croniter import croniter
 from datetime import datetime
 
+from vcclib import metrics
 from vcclib.common import is_set
 from vcclib.duckdb import DuckDB
 from vcclib.filesystem import directory_contains_files
@@ -42,12 +43,16 @@ def _run_now():
         logging.info(f"Staging files in input directory {input_directory} to stage directory {stage_directory}  ...")
         stage_directory_files(input_directory, stage_directory)
 
+    # each run reports its stages into a metrics summary, which is written at the end of the run
+    metrics.start('vdv457export')
+
     try:
         # set archive name for this batch
         archive_name: str = datetime.now().strftime('%Y%m%d%H%M%S')
 
         # initialize DuckDB instance
-        ddb = DuckDB(stage_directory, schema_filename)
+        with metrics.stage('load_data'):
+            ddb = DuckDB(stage_directory, schema_filename)
 
         # check whether all converters were running fine...
         # set to true at first, in case there's no converter enabled at all to avoid unneccessary 
@@ -121,12 +126,16 @@ def _run_now():
     # if all converters ran without error, archive input files; otherwise put them in an error folder
     # archive shall be created in input directory, so pass this as destination variable
     logging.info(f"Archiving files in input directory {stage_directory} ...")
-    archive_directory_files(
-        stage_directory, 
-        input_directory, 
-        archive_name,
-        any_converter_failed
-    )
+    with metrics.stage('archive_files'):
+        archive_directory_files(
+            stage_directory, 
+            input_directory, 
+            archive_name,
+            any_converter_failed
+        )
+
+    metrics.status('failed' if any_converter_failed else 'success')
+    metrics.finish()
 
 @click.group()
 def cli():
@@ -7,6 +7,7 @@ from typing import Set
 from typing import Tuple
 from xmltodict import unparse
 
+from vcclib import metrics
 from vcclib.common import isoformattime
 from vcclib.dataclasses import PassengerCountingEvent
 from vcclib.dataclasses import CountingSequence
@@ -28,19 +29,24 @@ class DefaultAdapter(BaseAdapter):
 
         # extract PCE from loaded data
         logging.info("Extracting PCE data from local DDB ...")
-        extracted_data: Dict[tuple, List[PassengerCountingEvent]] = self._extract(ddb)
+        with metrics.stage('vdv4572_extract'):
+            extracted_data: Dict[tuple, List[PassengerCountingEvent]] = self._extract(ddb)
 
         # transform each operation_day/trip_id combination into final data structure
         logging.info(f"Transforming data of {len(extracted_data.keys())} trips ...")
         
         transformed_data: Dict[tuple, tuple] = dict()
         for (operation_day, trip_id, vehicle_id), passenger_counting_events in extracted_data.items():
-            key, value = self._transform(ddb, operation_day, trip_id, vehicle_id, passenger_counting_events)
-            transformed_data[key] = value
+            with metrics.stage('vdv4572_transform'):
+                key, value = self._transform(ddb, operation_day, trip_id, vehicle_id, passenger_counting_events)
+                transformed_data[key] = value
 
         # export data finally
         logging.info(f"Exporting {len(transformed_data)} trips ...")
-        self._export(transformed_data, output_directory, dubious_output_directory)
+        with metrics.stage('vdv4572_export'):
+            self._export(transformed_data, output_directory, dubious_output_directory)
+
+        metrics.count('vdv4572_trips', len(transformed_data))
 
     def _extract(self, ddb: DuckDB) -> Dict[tuple, List[PassengerCountingEvent]]:
 
@@ -0,0 +1,28 @@
+import pytest
+import sqlobject
+
+from vcclib import database
+from vcclib.model import ImportGeneration
+from vcclib.model import Line
+from vcclib.model import PatternStop
+from vcclib.model import Stop
+from vcclib.model import StopPattern
+from vcclib.model import StopTime
+from vcclib.model import Trip
+
+
+@pytest.fixture
+def timetable_database(tmp_path):
+    # tests are running against a SQLite database of their own with empty timetable tables
+    connection = sqlobject.connectionForURI(f"sqlite:{tmp_path / 'vcc.db'}")
+    previous_connection = getattr(sqlobject.sqlhub, 'processConnection', None)
+
+    sqlobject.sqlhub.processConnection = connection
+
+    for model in [Stop, Line, StopPattern, PatternStop, Trip, StopTime, ImportGeneration]:
+        model.createTable(ifNotExists=True)
+
+    yield database.connection()
+
+    connection.close()
+    sqlobject.sqlhub.processConnection = previous_connection
@@ -0,0 +1,96 @@
+import pytest
+import sqlobject
+
+from vcclib import database
+from vcclib.model import ImportGeneration
+from vcclib.model import Line
+from vcclib.model import PatternStop
+from vcclib.model import Stop
+from vcclib.model import StopPattern
+from vcclib.model import StopTime
+from vcclib.model import Trip
+
+
+def create_shadow_stop(name):
+    shadow_tables = database.create_shadow_tables([Stop, Line, StopPattern, PatternStop, Trip, StopTime])
+
+    stops = database.BulkInsert(Stop, table=shadow_tables[Stop])
+    stops.insert(stop_id=1, name=name, latitude=48.78, longitude=9.18, parent_id=1)
+    stops.flush()
+
+    return shadow_tables
+
+
+def test_swap_shadow_tables(timetable_database):
+    Stop(stop_id=1, name='Previous', latitude=48.78, longitude=9.18, parent_id=1)
+
+    shadow_tables = create_shadow_stop('Next')
+    database.swap_shadow_tables(shadow_tables, {'generation': 1, 'operation_day': 20261018, 'created_timestamp': 0, 'fingerprint': 'abc', 'manifest': None})
+
+    assert [s.name for s in Stop.select()] == ['Next']
+    assert ImportGeneration.current() == 1
+    assert ImportGeneration.latest().fingerprint == 'abc'
+
+
+def test_swap_shadow_tables_without_generation(timetable_database):
+    Stop(stop_id=1, name='Previous', latitude=48.78, longitude=9.18, parent_id=1)
+
+    shadow_tables = create_shadow_stop('Next')
+
+    # the generation can't be inserted, so the tables aren't switched either
+    timetable_database.query(f"DROP TABLE {ImportGeneration.sqlmeta.table}")
+
+    with pytest.raises(Exception):
+        database.swap_shadow_tables(shadow_tables, {'generation': 1, 'operation_day': 20261018, 'created_timestamp': 0, 'fingerprint': 'abc', 'manifest': None})
+
+    assert [r[0] for r in timetable_database.queryAll(f"SELECT name FROM {Stop.sqlmeta.table}")] == ['Previous']
+    assert [r[0] for r in timetable_database.queryAll(f"SELECT name FROM {shadow_tables[Stop]}")] == ['Next']
+
+
+def test_migrate_tables_twice(timetable_database):
+    database.create_tables()
+    database.migrate_tables()
+    indexes = database._list_indexes(StopTime.sqlmeta.table)
+
+    # a second migration finds everything in place and doesn't change anything
+    database.create_tables()
+    database.migrate_tables()
+
+    assert database._list_indexes(StopTime.sqlmeta.table) == indexes
+
+
+
+def test_migrate_tables_marks_starting_stops(timetable_database):
+    # the column was added by a previous start which failed before marking the stops
+    line = Line(line_id=1, name='1')
+    stop = Stop(stop_id=10, name='Hauptbahnhof', latitude=48.78, longitude=9.18, parent_id=1)
+    trip = Trip(trip_id=100, line=line, direction=1, operation_day=20261018)
+    StopTime(trip=trip, stop=stop, arrival_timestamp=1000, departure_timestamp=1000, sequence=1)
+
+    assert database.starting_stops_marked() is False
+
+    database.migrate_tables()
+
+    stop.sync()
+    assert stop.starting_trips
+    assert database.starting_stops_marked() is True
+
+class MySQLErrorMessage(str):
+    def __new__(cls, message, code):
+        obj = str.__new__(cls, message)
+        obj.code = code
+        return obj
+
+
+def raise_mysql_error(code):
+    raise sqlobject.dberrors.OperationalError(MySQLErrorMessage('error', code))
+
+
+def test_ignore_existing():
+    # columns and indexes added by another process in the meantime are ignored
+    assert database._ignore_existing(raise_mysql_error, 1060) is False
+    assert database._ignore_existing(raise_mysql_error, 1061) is False
+    assert database._ignore_existing(lambda: None) is True
+
+    with pytest.raises(sqlobject.dberrors.OperationalError):
+        database._ignore_existing(raise_mysql_error, 1062)
@@ -0,0 +1,33 @@
+import pytest
+
+from vcclib.x10 import read_x10_table
+
+from test_x10 import RECORDS
+from test_x10 import write_x10_file
+
+duckdb = pytest.importorskip('duckdb')
+
+from vcclib.duckdb import X10DuckDB
+
+
+@pytest.mark.parametrize('encoding', ['cp1252', 'utf-8'])
+def test_load_x10_file(tmp_path, encoding):
+    filename = write_x10_file(tmp_path / 'rec_ort.x10', RECORDS, encoding=encoding)
+
+    x10_duckdb = X10DuckDB()
+    table_name = x10_duckdb.load_x10_file(filename, encoding=encoding)
+
+    x10_table = read_x10_table(filename, encoding=encoding)
+
+    cursor = x10_duckdb.execute(f"SELECT * FROM \"{table_name}\"")
+    names = [d[0] for d in cursor.description]
+    records = [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    column_types = {row[0]: row[1] for row in x10_duckdb.execute(f"DESCRIBE \"{table_name}\"").fetchall()}
+
+    # column types and values are the same as read by the columnar X10 reader, NULL values of numeric columns are NULL
+    assert table_name == 'rec_ort'
+    assert names == x10_table.table.schema.names
+    assert column_types == {'ONR_TYP_NR': 'INTEGER', 'ORT_NR': 'INTEGER', 'ORT_NAME': 'VARCHAR', 'ORT_POS_LAENGE': 'BIGINT', 'HALT_KURZBEZ': 'VARCHAR'}
+    assert records == x10_table.table.to_pylist()
+    assert records[1]['ORT_POS_LAENGE'] is None
@@ -0,0 +1,50 @@
+import pytest
+import sqlobject
+
+from vccbenchmark.generator import Vdv452Generator
+from vcclib.model import ImportGeneration
+from vcclib.model import Line
+from vcclib.model import PatternStop
+from vcclib.model import Stop
+from vcclib.model import StopPattern
+from vcclib.model import StopTime
+from vcclib.model import Trip
+from vccvdv452import.adapter.default import DefaultAdapter
+
+
+@pytest.fixture(scope='module')
+def input_directory(tmp_path_factory):
+    # the trips of a day are split into two shards of stop times
+    input_directory = tmp_path_factory.mktemp('vdv452')
+    Vdv452Generator(num_stops=50, num_lines=5, num_trips=4000, num_days=2, route_length=6, seed=452).generate(str(input_directory))
+
+    return input_directory
+
+
+def import_timetable(input_directory, database_filename, num_workers, monkeypatch):
+    monkeypatch.setenv('VCC_VDV452_IMPORT_WORKERS', str(num_workers))
+    monkeypatch.setenv('VCC_VDV452_IMPORT_HORIZON_DAYS', '0')
+    monkeypatch.setenv('VCC_VDV452_IMPORT_STORAGE', 'stoptimes')
+
+    connection = sqlobject.connectionForURI(f"sqlite:{database_filename}")
+    previous_connection = getattr(sqlobject.sqlhub, 'processConnection', None)
+
+    sqlobject.sqlhub.processConnection = connection
+    try:
+        for model in [Stop, Line, StopPattern, PatternStop, Trip, StopTime, ImportGeneration]:
+            model.createTable(ifNotExists=True)
+
+        DefaultAdapter().process(str(input_directory), force=True)
+
+        return {model: connection.queryAll(f"SELECT * FROM {model.sqlmeta.table} ORDER BY id") for model in [Trip, StopTime]}
+    finally:
+        connection.close()
+        sqlobject.sqlhub.processConnection = previous_connection
+
+
+def test_parallel_stop_times_equal_serial_run(input_directory, tmp_path, monkeypatch):
+    serial = import_timetable(input_directory, tmp_path / 'serial.db', 1, monkeypatch)
+    parallel = import_timetable(input_directory, tmp_path / 'parallel.db', 2, monkeypatch)
+
+    assert len(serial[StopTime]) == 4000 * 6
+    assert parallel == serial
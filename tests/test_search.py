@@ -0,0 +1,64 @@
+import pytest
+import random
+import subprocess
+import sys
+
+from difflib import SequenceMatcher
+
+from vcclib.search import StationIndex
+from vcclib.search import normalize
+
+
+def lookup_all(stations, lookup_name, limit=30):
+    # the similarity of every station is calculated, results are ordered by their
+    # similarity and then by the order of the stations
+    result = list()
+    for parent_id, name, latitude, longitude in stations:
+        similarity = SequenceMatcher(None, normalize(name), normalize(lookup_name)).ratio()
+        if similarity > 0.5:
+            result.append({'parent_id': parent_id, 'name': name, 'latitude': latitude, 'longitude': longitude, 'similarity': similarity})
+
+    return sorted(result, key=lambda s: s['similarity'], reverse=True)[:limit]
+
+
+def create_stations(num_stations):
+    rnd = random.Random(452)
+    syllables = ['stutt', 'gart', 'haupt', 'bahn', 'hof', 'platz', 'berg', 'feld', 'weg', 'markt', 'kirch', 'heim', 'tal', 'str', 'ß', 'ö', 'ü']
+
+    stations = list()
+    for i in range(num_stations):
+        words = [''.join(rnd.choices(syllables, k=rnd.randint(1, 3))).title() for _ in range(rnd.randint(1, 3))]
+        stations.append((i, ' '.join(words), 48.0, 9.0))
+
+    return stations
+
+
+@pytest.mark.parametrize('num_stations', [0, 1, 100, 1000])
+def test_lookup_equals_all_stations(num_stations):
+    stations = create_stations(num_stations)
+    index = StationIndex(stations)
+
+    rnd = random.Random(457)
+    lookup_names = ['', 'a', 'Hbf', 'Stuttgart Hbf', 'Hauptbahnhof', 'xyz']
+    for _, name, _, _ in rnd.sample(stations, min(20, len(stations))):
+        lookup_names.extend([name, name[:3], name[:8], name.upper(), name[::-1], name.split(' ')[-1]])
+
+    for lookup_name in lookup_names:
+        expected = lookup_all(stations, lookup_name)
+
+        assert index.lookup(lookup_name) == expected, lookup_name
+        assert index.lookup(lookup_name, 5) == expected[:5], lookup_name
+
+
+def test_lookup_without_common_trigrams():
+    # the names share no trigram, but their similarity is 8/14
+    stations = [(1, 'xabycdz', 48.0, 9.0), (2, 'Hauptbahnhof', 48.0, 9.0)]
+
+    assert StationIndex(stations).lookup('wabvcdu') == lookup_all(stations, 'wabvcdu')
+    assert len(StationIndex(stations).lookup('wabvcdu')) == 1
+
+
+def test_models_without_numpy():
+    # the master data import has no numpy, so the models must not import the search index at module level
+    code = "import sys; sys.modules['numpy'] = None; import vcclib.database; import vccmdimport.adapter.csv"
+    subprocess.run([sys.executable, '-c', code], check=True, env={'PYTHONPATH': ':'.join(sys.path)})
@@ -0,0 +1,48 @@
+import itertools
+import pytest
+
+from vcclib.model import ImportGeneration
+from vcclib.model import Line
+from vcclib.model import Stop
+from vcclib.model import StopTime
+from vcclib.model import Trip
+from vccapi.snapshot import SnapshotCache
+from vccapi.snapshot import TimetableSnapshot
+
+
+@pytest.fixture
+def trip(timetable_database):
+    line = Line(line_id=1, name='1')
+    stop = Stop(stop_id=10, name='Hauptbahnhof', latitude=48.78, longitude=9.18, parent_id=1, starting_trips=True)
+
+    trip = Trip(trip_id=100, line=line, direction=1, operation_day=20261018)
+    StopTime(trip=trip, stop=stop, arrival_timestamp=1000, departure_timestamp=1000, sequence=1)
+
+    return trip
+
+
+def test_missing_references(trip):
+    # stop times of another import reference stops which aren't loaded
+    StopTime(trip=trip, stopID=999, arrival_timestamp=1100, departure_timestamp=None, sequence=2)
+
+    with pytest.raises(ValueError):
+        TimetableSnapshot(None)
+
+
+def test_generation_changed_while_building(trip, monkeypatch):
+    # the generation changes while the first snapshot is built, so it's discarded and built again
+    generations = itertools.chain([1, 1], itertools.repeat(2))
+    monkeypatch.setattr(ImportGeneration, 'current', classmethod(lambda cls: next(generations)))
+
+    cache = SnapshotCache(60)
+
+    assert cache.get().generation == 2
+    assert cache.stats()['builds'] == 1
+
+
+def test_no_consistent_snapshot(trip, monkeypatch):
+    monkeypatch.setattr(ImportGeneration, 'current', classmethod(lambda cls: None))
+    StopTime(trip=trip, stopID=999, arrival_timestamp=1100, departure_timestamp=None, sequence=2)
+
+    with pytest.raises(RuntimeError):
+        SnapshotCache(60).get()
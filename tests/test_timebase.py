@@ -0,0 +1,63 @@
+import numpy
+import pytest
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from zoneinfo import ZoneInfo
+
+from vcclib.timebase import TimeBase
+
+
+def create_timestamp(operation_day, seconds, timezone_name):
+    # wall clock times which don't exist or exist twice resolve with fold=0 of zoneinfo
+    wall_time = datetime.strptime(str(operation_day), '%Y%m%d') + timedelta(seconds=seconds)
+    return int(wall_time.replace(tzinfo=ZoneInfo(timezone_name), fold=0).timestamp())
+
+
+@pytest.mark.parametrize('operation_day, timezone_name', [
+    (20260329, 'Europe/Berlin'),
+    (20261025, 'Europe/Berlin'),
+    (20260328, 'Europe/Berlin'),
+    (20261024, 'Europe/Berlin'),
+    (20260615, 'Europe/Berlin'),
+    (20260308, 'America/New_York'),
+    (20261101, 'America/New_York'),
+    (20260405, 'Australia/Sydney'),
+    (20261004, 'Australia/Sydney')
+])
+def test_to_timestamp(operation_day, timezone_name):
+    time_base = TimeBase(operation_day, timezone_name)
+
+    # trips may start up to a day after midnight of their operation day, FRT_START > 86400
+    seconds = list(range(0, 2 * 86400 + 1, 300))
+    expected = [create_timestamp(operation_day, s, timezone_name) for s in seconds]
+
+    assert [time_base.to_timestamp(s) for s in seconds] == expected
+    assert time_base.to_timestamps(numpy.array(seconds)).tolist() == expected
+
+
+def test_gap():
+    time_base = TimeBase(20260329, 'Europe/Berlin')
+
+    # 02:30 doesn't exist, it's moved forward by the gap to 03:30 CEST
+    assert time_base.to_timestamp(2 * 3600 + 1800) == int(datetime(2026, 3, 29, 1, 30, tzinfo=timezone.utc).timestamp())
+    assert time_base.to_timestamp(3 * 3600) == int(datetime(2026, 3, 29, 1, 0, tzinfo=timezone.utc).timestamp())
+    assert time_base.length == 23 * 3600
+
+
+def test_repeated_hour():
+    time_base = TimeBase(20261025, 'Europe/Berlin')
+
+    # 02:30 exists twice, it's resolved to the first occurrence in CEST, unlike pytz with is_dst=False
+    assert time_base.to_timestamp(2 * 3600 + 1800) == int(datetime(2026, 10, 25, 0, 30, tzinfo=timezone.utc).timestamp())
+    assert time_base.to_timestamp(3 * 3600) == int(datetime(2026, 10, 25, 2, 0, tzinfo=timezone.utc).timestamp())
+    assert time_base.length == 25 * 3600
+
+
+def test_midnight():
+    time_base = TimeBase(20260615, 'Europe/Berlin')
+
+    assert time_base.midnight == int(datetime(2026, 6, 14, 22, 0, tzinfo=timezone.utc).timestamp())
+    assert time_base.length == 86400
+    assert time_base.to_seconds(time_base.to_timestamp(90000)) == 90000
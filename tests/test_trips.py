@@ -0,0 +1,38 @@
+import pytest
+
+from vcclib.model import Line
+from vcclib.model import Stop
+from vcclib.model import StopTime
+from vcclib.model import Trip
+from vccapi.snapshot import TimetableSnapshot
+
+
+@pytest.fixture
+def trips(timetable_database):
+    line = Line(line_id=1, name='1')
+    stop = Stop(stop_id=10, name='Hauptbahnhof', latitude=48.78, longitude=9.18, parent_id=1, starting_trips=True)
+
+    # the same trip is imported for two operation days
+    for operation_day in [20261018, 20261019]:
+        trip = Trip(trip_id=100, line=line, direction=1, operation_day=operation_day)
+        StopTime(trip=trip, stop=stop, arrival_timestamp=1000, departure_timestamp=1000, sequence=1)
+
+
+@pytest.mark.parametrize('operation_day, explicit_operation_day, expected', [
+    (20261018, True, 20261018),
+    (20261019, True, 20261019),
+    (20261017, True, 20261018),
+    (20261020, True, None),
+    (20261020, False, 20261019),
+])
+def test_trip_of_operation_day(trips, operation_day, explicit_operation_day, expected):
+    trip = Trip.find(100, operation_day, explicit_operation_day)
+    snapshot_trip = TimetableSnapshot(None).trip(100, operation_day, explicit_operation_day)
+
+    assert (trip.operation_day if trip is not None else None) == expected
+    assert (snapshot_trip['operation_day'] if snapshot_trip is not None else None) == expected
+
+
+def test_unknown_trip(trips):
+    assert Trip.find(101, 20261018) is None
+    assert TimetableSnapshot(None).trip(101, 20261018) is None
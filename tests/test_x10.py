@@ -0,0 +1,82 @@
+import pytest
+
+from vcclib.x10 import X10File
+from vcclib.x10 import read_x10_file
+from vcclib.x10 import read_x10_table
+
+
+HEADER = [
+    'mod; DD.MM.YYYY; HH:MM:SS; free',
+    'src; "VdvCountCore"; "18.10.2026"; "12:00:00"',
+    'chs; "ISO8859-1"',
+    'ver; "1.4"',
+    'ifv; "1.4"',
+    'dve; "1.0"',
+    'fft; ""',
+    'tbl; rec_ort',
+    'atr; ONR_TYP_NR; ORT_NR; ORT_NAME; ORT_POS_LAENGE; HALT_KURZBEZ',
+    'frm; num[2.0]; num[6.0]; char[40]; num[10.0]; char[8]'
+]
+
+RECORDS = [
+    'rec; 1; 1001; "Hauptbahnhof"; 91823456; "HBF"',
+    'rec; 1; 1002; "Marktplatz Süd"; NULL; "MPS"',
+    'rec; 2; 1003; "Königstraße"; 91834567; NULL',
+    'rec; 1; 1004; "Straßenbahnhof Möhringen"; 91845678; "SMÖ"'
+]
+
+
+def write_x10_file(path, records, num_records=None, encoding='cp1252'):
+    lines = HEADER + records + [f"end; {num_records if num_records is not None else len(records)}", 'eof; 1']
+    path.write_text('\n'.join(lines) + '\n', encoding=encoding)
+
+    return str(path)
+
+
+def assert_equal_records(filename, columns, filters):
+    x10_table = read_x10_table(filename, encoding='cp1252', columns=columns, filters=filters)
+    x10_file = read_x10_file(filename, encoding='cp1252', columns=columns, filters=filters)
+
+    assert x10_table.attributes == x10_file.attributes
+    assert x10_table.datatypes == x10_file.datatypes
+    assert list(x10_table.records) == list(x10_file.records)
+
+
+SELECTIONS = [
+    (None, None),
+    (['ORT_NR', 'ORT_NAME'], None),
+    (None, {'ONR_TYP_NR': 1}),
+    (['ORT_NAME', 'HALT_KURZBEZ'], {'ONR_TYP_NR': [1, 2], 'ORT_NR': [1002, 1003]}),
+    (['ORT_NAME'], {'ORT_NR': 9999})
+]
+
+
+@pytest.mark.parametrize('columns, filters', SELECTIONS)
+def test_read_table(tmp_path, monkeypatch, columns, filters):
+    filename = write_x10_file(tmp_path / 'rec_ort.x10', RECORDS)
+
+    # well-formed files are read by arrow without falling back to the row based reader
+    monkeypatch.setattr(X10File, '_read_table_rows', lambda *args: pytest.fail('fallback to the row based reader'))
+
+    assert_equal_records(filename, columns, filters)
+
+
+@pytest.mark.parametrize('columns, filters', SELECTIONS)
+def test_read_table_malformed_records(tmp_path, columns, filters):
+    filename = write_x10_file(tmp_path / 'rec_ort.x10', RECORDS[:2] + ['rec; 1; 1005'] + RECORDS[2:])
+
+    assert_equal_records(filename, columns, filters)
+
+
+@pytest.mark.parametrize('columns, filters', SELECTIONS)
+def test_read_table_without_records(tmp_path, columns, filters):
+    filename = write_x10_file(tmp_path / 'rec_ort.x10', list())
+
+    assert_equal_records(filename, columns, filters)
+
+
+def test_read_table_unknown_filter_column(tmp_path):
+    filename = write_x10_file(tmp_path / 'rec_ort.x10', RECORDS)
+
+    with pytest.raises(ValueError):
+        read_x10_table(filename, encoding='cp1252', filters={'UNKNOWN': 1})